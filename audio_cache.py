@@ -0,0 +1,177 @@
+# audio_cache.py
+"""
+합성된 음성 바이트 캐시 (메모리 LRU + 디스크, 내용 주소 기반)
+
+- key: (음성 스타일, 정제된 텍스트, 감정, 변조 강도, 시드, 출력 포맷, 엔진/뱅크 버전) 의 sha256
+    (엔진을 바꾸거나 사운드 뱅크를 다시 만들면 key 가 달라져 예전 클립을 쓰지 않음)
+- 값: 최종 인코딩된 바이트 → 적중하면 합성/인코딩 모두 건너뜀
+- 디스크 저장소는 같은 폴더를 쓰는 모든 세션 / 워커 프로세스가 공유
+- 메모리, 디스크 모두 바이트 크기 기준으로 오래된 것부터 제거
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from latency_metrics import increment
+
+BASE_DIR = os.path.dirname(__file__)
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", os.path.join(BASE_DIR, "cache", "audio"))
+AUDIO_CACHE_MEMORY_MB = float(os.getenv("AUDIO_CACHE_MEMORY_MB", "64"))
+AUDIO_CACHE_DISK_MB = float(os.getenv("AUDIO_CACHE_DISK_MB", "512"))
+
+
+def audio_cache_key(voice_style, text, emotion=None, random_factor=None, seed=None, audio_format="wav",
+                    engine=None) -> str:
+    """캐시 key (같은 요청 + 같은 엔진/뱅크면 항상 같은 값)"""
+    payload = json.dumps(
+        [voice_style, text, emotion, random_factor, seed, audio_format, engine],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    def __init__(
+        self,
+        cache_dir: Optional[str] = AUDIO_CACHE_DIR,
+        memory_bytes: int = int(AUDIO_CACHE_MEMORY_MB * 1024 * 1024),
+        disk_bytes: int = int(AUDIO_CACHE_DISK_MB * 1024 * 1024),
+    ):
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self._disk_size = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._disk_size = sum(size for _, _, size in self._scan_disk())
+
+    # ---------------------------------------------------------------- memory
+    def _memory_put(self, key: str, data: bytes):
+        if len(data) > self.memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_size -= len(old)
+            self._memory[key] = data
+            self._memory_size += len(data)
+            while self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+
+    # ------------------------------------------------------------------ disk
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _scan_disk(self):
+        """(mtime, path, size) 목록"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def _evict_disk(self):
+        """다른 프로세스가 쓴 파일까지 다시 세고, 오래된 것부터 90% 이하가 될 때까지 삭제"""
+        entries = sorted(self._scan_disk())
+        total = sum(size for _, _, size in entries)
+        target = self.disk_bytes * 0.9
+        for _, path, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+        self._disk_size = total
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # 최근 사용 표시 (LRU)
+            return data
+        except OSError:
+            return None
+
+    def _disk_put(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            old_size = os.path.getsize(path)  # 같은 key 를 다시 쓰면 늘어난 만큼만 더함
+        except OSError:
+            old_size = 0
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)  # 다른 프로세스가 반쯤 쓴 파일을 읽지 않도록
+        except OSError as e:
+            print(f"[경고] 오디오 캐시 저장 실패 → {e}")
+            return
+        with self._lock:
+            self._disk_size += len(data) - old_size
+            over = self._disk_size > self.disk_bytes
+        if over:
+            self._evict_disk()
+
+    # ---------------------------------------------------------------- public
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                increment("audio_cache_hit")
+                return data
+        data = self._disk_get(key) if self.cache_dir else None
+        if data is None:
+            increment("audio_cache_miss")
+            return None
+        increment("audio_cache_hit")
+        self._memory_put(key, data)
+        return data
+
+    def put(self, key: str, data: bytes):
+        self._memory_put(key, data)
+        if self.cache_dir and len(data) <= self.disk_bytes:
+            self._disk_put(key, data)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+        if self.cache_dir:
+            for _, path, _ in self._scan_disk():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._disk_size = 0
+
+
+_CACHE: Optional[AudioCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_audio_cache() -> AudioCache:
+    """프로세스 전역 오디오 캐시"""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = AudioCache()
+    return _CACHE
@@ -0,0 +1,111 @@
+# audio_encoder.py
+"""
+AudioSegment → 재생/다운로드용 바이트 인코더
+
+- "wav": 헤더 + raw PCM (서브프로세스 없음, 가장 빠르지만 용량이 큼)
+- "mp3": lameenc 가 설치돼 있으면 프로세스 안에서 인코딩, 없으면 pydub(ffmpeg) 로 대체
+
+사용할 포맷은 AUDIO_FORMAT 환경변수로 선택 (기본 "wav")
+포맷별 용량/시간 비교:
+
+    python audio_encoder.py
+"""
+import io
+import os
+import time
+import wave
+from typing import Callable, Dict, NamedTuple
+
+from pydub import AudioSegment
+
+try:
+    import lameenc
+except ImportError:  # 선택 의존성
+    lameenc = None
+
+AUDIO_FORMAT = os.getenv("AUDIO_FORMAT", "wav")  # "wav" | "mp3"
+MP3_BITRATE = 64                                  # kbps (짧은 효과음 위주라 충분)
+
+
+class EncodedAudio(NamedTuple):
+    data: bytes
+    mime: str
+    extension: str
+    encode_seconds: float  # 인코딩에 걸린 시간 (비교용)
+
+
+def pcm_to_wav(pcm: bytes, frame_rate: int, channels: int = 1, sample_width: int = 2) -> bytes:
+    """raw PCM 에 WAV 헤더만 붙임 (임시 파일 / ffmpeg 미사용)"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(sample_width)
+        f.setframerate(frame_rate)
+        f.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def encode_wav(audio_segment: AudioSegment) -> bytes:
+    """WAV 헤더 + raw PCM (ffmpeg 미사용)"""
+    return pcm_to_wav(
+        audio_segment.raw_data,
+        audio_segment.frame_rate,
+        audio_segment.channels,
+        audio_segment.sample_width,
+    )
+
+
+def encode_mp3(audio_segment: AudioSegment) -> bytes:
+    """lameenc 로 프로세스 안에서 mp3 인코딩 (없으면 ffmpeg 서브프로세스)"""
+    if lameenc is None:
+        buffer = io.BytesIO()
+        audio_segment.export(buffer, format="mp3", bitrate=f"{MP3_BITRATE}k")
+        return buffer.getvalue()
+    seg = audio_segment.set_sample_width(2)
+    encoder = lameenc.Encoder()
+    encoder.set_bit_rate(MP3_BITRATE)
+    encoder.set_in_sample_rate(seg.frame_rate)
+    encoder.set_channels(seg.channels)
+    encoder.set_quality(2)
+    return bytes(encoder.encode(seg.raw_data) + encoder.flush())
+
+
+ENCODERS: Dict[str, Callable[[AudioSegment], bytes]] = {
+    "wav": encode_wav,
+    "mp3": encode_mp3,
+}
+MIME_TYPES = {
+    "wav": "audio/wav",
+    "mp3": "audio/mp3",
+}
+
+
+def encode_audio(audio_segment: AudioSegment, audio_format: str = AUDIO_FORMAT) -> EncodedAudio:
+    if audio_format not in ENCODERS:
+        raise ValueError(f"지원하지 않는 오디오 포맷: {audio_format} (가능: {', '.join(ENCODERS)})")
+    start = time.perf_counter()
+    data = ENCODERS[audio_format](audio_segment)
+    return EncodedAudio(data, MIME_TYPES[audio_format], audio_format, time.perf_counter() - start)
+
+
+def main():
+    import math
+    import struct
+
+    # 3초짜리 테스트 톤 (44.1kHz mono)
+    rate = 44_100
+    samples = (int(8000 * math.sin(2 * math.pi * 440 * i / rate)) for i in range(rate * 3))
+    seg = AudioSegment(b"".join(struct.pack("<h", s) for s in samples), sample_width=2, frame_rate=rate, channels=1)
+
+    print(f"mp3 인코더: {'lameenc (in-process)' if lameenc else 'pydub/ffmpeg (subprocess)'}")
+    for audio_format in ENCODERS:
+        try:
+            encoded = encode_audio(seg, audio_format)
+        except Exception as e:
+            print(f"{audio_format:>4}: 실패 → {e}")
+            continue
+        print(f"{audio_format:>4}: {len(encoded.data) / 1024:8.1f} KB  {encoded.encode_seconds * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,13 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 import streamlit as st
-import time
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+# (체인 / ChatOpenAI 관련 langchain, openai 는 create_chatbot 에서 import → 첫 화면이 기다리지 않음)
 from langchain_community.chat_message_histories import StreamlitChatMessageHistory
-from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain_openai import ChatOpenAI
-from langchain_core.output_parsers import StrOutputParser
 
 from prompts.prompt import SYSTEM_PROMPT
+from llm_cache import with_response_cache
+from llm_clients import get_chat_llm, preload_llm_modules
+from chat_context import current_session_id, get_context_window
 
 # OPENAI_API_KEY = st.secrets["OPENAI_API_KEY"]
 # os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
@@ -17,16 +16,22 @@ from prompts.prompt import SYSTEM_PROMPT
 # 웹사이트 제목
 st.title("OpenAI Chatbot with Memory")
 
-# Streamlit용 채팅 히스토리 설정
-@st.cache_resource
+# Streamlit용 채팅 히스토리 설정 (세션마다 자신의 st.session_state 에 저장)
 def get_chat_history():
     return StreamlitChatMessageHistory(key="chat_messages")
 
 def get_session_history(session_id: str):
+    # session_id = 현재 Streamlit 세션 ID (current_session_id), 히스토리는 그 세션 상태에 있음
     return get_chat_history()
 
 # OpenAI 챗봇 설정
+@st.cache_resource(show_spinner=False)  # (모델, temperature) 별로 프로세스당 한 번만 생성
 def create_chatbot(model_name="gpt-3.5-turbo", temperature=0.7):
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+    from langchain_core.runnables import RunnableLambda
+    from langchain_core.runnables.history import RunnableWithMessageHistory
+    from langchain_core.output_parsers import StrOutputParser
+
     # 프롬프트 템플릿 설정
     prompt = ChatPromptTemplate.from_messages([
         ("system", SYSTEM_PROMPT),
@@ -34,15 +39,12 @@ def create_chatbot(model_name="gpt-3.5-turbo", temperature=0.7):
         ("human", "{input}")
     ])
     
-    # ChatOpenAI 모델 설정
-    llm = ChatOpenAI(
-        openai_api_key=os.getenv("OPENAI_API_KEY"),
-        model=model_name,
-        temperature=temperature
-    )
+    # ChatOpenAI 모델 (모델/temperature 별로 하나, 연결 풀 공유)
+    llm = get_chat_llm(model_name, temperature)
     
     # 체인 구성
-    chain = prompt | llm | StrOutputParser()
+    # (히스토리는 CHAT_CONTEXT_POLICY 에 맞게 잘라서 프롬프트에 넣음)
+    chain = RunnableLambda(get_context_window()) | prompt | llm | StrOutputParser()
     
     # 메시지 히스토리와 함께 실행 가능한 체인 생성
     with_message_history = RunnableWithMessageHistory(
@@ -52,7 +54,10 @@ def create_chatbot(model_name="gpt-3.5-turbo", temperature=0.7):
         history_messages_key="history",
     )
     
-    return with_message_history
+    # (선택) 같은 요청은 LLM 호출 없이 캐시된 답변 사용
+    return with_response_cache(
+        with_message_history, get_session_history, SYSTEM_PROMPT, model_name, temperature
+    )
 
 # 사이드바 설정
 with st.sidebar:
@@ -97,9 +102,6 @@ for message in msgs.messages:
     with st.chat_message(message.type):
         st.markdown(message.content)
 
-# 챗봇 설정 (대화 시작 전에 한 번만 생성)
-chatbot = create_chatbot(model_name=model_name, temperature=temperature)
-
 # 사용자 입력 처리
 if prompt := st.chat_input("메시지를 입력하세요..."):
     
@@ -107,6 +109,9 @@ if prompt := st.chat_input("메시지를 입력하세요..."):
     if not os.getenv("OPENAI_API_KEY"):
         st.error("OPENAI_API_KEY가 .env 파일에 설정되지 않았습니다.")
         st.stop()
+
+    # 챗봇 설정 (첫 메시지에서 생성 → 이후는 캐시, 첫 화면 렌더는 LLM 클라이언트 import 를 기다리지 않음)
+    chatbot = create_chatbot(model_name=model_name, temperature=temperature)
     
     # 사용자 메시지 표시
     with st.chat_message("user"):
@@ -117,18 +122,14 @@ if prompt := st.chat_input("메시지를 입력하세요..."):
         message_placeholder = st.empty()
         
         try:
-            # AI 응답 생성
-            response = chatbot.invoke(
+            # AI 응답 스트리밍 (토큰이 도착하는 대로 표시, 히스토리는 스트림 종료 시 자동 저장)
+            response = ""
+            for chunk in chatbot.stream(
                 {"input": prompt},
-                config={"configurable": {"session_id": "default"}}
-            )
-            
-            # 타이핑 효과로 응답 표시
-            displayed_response = ""
-            for word in response.split():
-                displayed_response += word + " "
-                time.sleep(0.05)
-                message_placeholder.markdown(displayed_response + "▌")
+                config={"configurable": {"session_id": current_session_id()}}
+            ):
+                response += chunk
+                message_placeholder.markdown(response + "▌")
             
             # 최종 응답 표시
             message_placeholder.markdown(response)
@@ -150,3 +151,6 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+
+# 첫 화면을 다 그린 뒤 첫 메시지에 필요한 LLM 모듈을 백그라운드에서 미리 import (프로세스당 한 번)
+preload_llm_modules()
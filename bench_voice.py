@@ -0,0 +1,223 @@
+# bench_voice.py
+"""
+음성 엔진 / 인코더 마이크로 벤치마크 (네트워크 미사용)
+
+    python bench_voice.py                              # 전체 측정 → bench_results.json
+    python bench_voice.py --engines nook r2d2 --sizes 10 100
+    python bench_voice.py --save-baseline              # 현재 결과를 기준값으로 저장
+    python bench_voice.py --threshold 0.2              # 기준값 대비 20% 넘게 느려지면 회귀로 표시
+
+- 입력: 한국어 / 영어 / 혼합 합성 텍스트 × 10, 100, 1,000, 5,000자 (고정 시드라 매번 같음)
+- 너굴은 gTTS 를 끄고 samples/ (또는 nook_bank.npz / 사운드 뱅크) 만 사용
+- 측정: 실행 시간(중앙값/최솟값), tracemalloc 피크 메모리, 초당 글자 수
+- 기준값에 있는 항목보다 느려지면 REGRESSION 으로 표시하고 종료 코드 1 반환
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+# 너굴 엔진이 서빙 중 gTTS 를 호출하지 않도록 import 전에 설정
+os.environ.setdefault("NOOK_ALLOW_GTTS", "0")
+
+from pydub import AudioSegment
+
+from audio_encoder import encode_mp3, encode_wav
+from get_edie import generate_edie_voice
+from get_nook import ENGINES as NOOK_ENGINES, generate_nook_voice, get_nook_bank
+from get_r2d2 import generate_r2d2_voice
+
+BASE_DIR = os.path.dirname(__file__)
+RESULTS_PATH = os.path.join(BASE_DIR, "bench_results.json")
+BASELINE_PATH = os.path.join(BASE_DIR, "bench_baseline.json")
+SIZES = [10, 100, 1_000, 5_000]
+LANGS = ["ko", "en", "mixed"]
+REPEAT = 5
+THRESHOLD = 0.15  # 기준값 대비 15% 넘게 느려지면 회귀
+MIN_DELTA_S = 0.0005  # 0.5ms 미만 차이는 측정 잡음으로 보고 무시
+SEED = 1234
+
+KO_WORDS = ["안녕하세요", "너굴", "입니다", "오늘", "날씨가", "좋네요", "섬에", "오신", "걸", "환영해요", "구리구리", "대출금은"]
+EN_WORDS = ["hello", "nook", "island", "bells", "loan", "today", "weather", "is", "nice", "welcome", "r2d2", "beep"]
+PUNCT = [".", ",", "!", "?", "~"]
+
+
+def make_text(lang: str, size: int, seed: int = SEED) -> str:
+    """고정 시드로 lang 스타일의 size 글자짜리 문장을 만듦"""
+    rng = random.Random(f"{seed}:{lang}:{size}")
+    words = {"ko": KO_WORDS, "en": EN_WORDS, "mixed": KO_WORDS + EN_WORDS}[lang]
+    parts = []
+    length = 0
+    while length < size:
+        word = rng.choice(words)
+        if rng.random() < 0.15:
+            word += rng.choice(PUNCT)
+        parts.append(word)
+        length += len(word) + 1
+    return " ".join(parts)[:size]
+
+
+def _tone_for(text: str) -> AudioSegment:
+    """인코더 입력: 엔진과 무관하게 글자 수에 비례하는 길이의 고정 신호 (글자당 80ms, 44.1kHz mono)"""
+    rate = 44_100
+    frames = len(text) * rate * 80 // 1000
+    pattern = bytes(range(0, 256, 8)) * 2
+    pcm = (pattern * (frames * 2 // len(pattern) + 1))[:frames * 2]
+    return AudioSegment(pcm, sample_width=2, frame_rate=rate, channels=1)
+
+
+def _nook(text):
+    return generate_nook_voice(text, lang="ko")
+
+
+def _nook_table(text):
+    # 변형 테이블은 워밍업 실행에서 만들어지므로 측정에는 복사 비용만 들어감
+    return NOOK_ENGINES["table"](text, random.Random(SEED), lang="ko")
+
+
+def _r2d2(text):
+    return generate_r2d2_voice(text, BASE_DIR)
+
+
+def _edie(text):
+    return generate_edie_voice(text, "neutral")
+
+
+# name → (준비 함수: text → 인자, 측정 함수)
+BENCHMARKS: Dict[str, tuple] = {
+    "nook": (lambda text: text, _nook),
+    "nook_table": (lambda text: text, _nook_table),
+    "r2d2": (lambda text: text, _r2d2),
+    "edie": (lambda text: text, _edie),
+    "encode_wav": (_tone_for, encode_wav),
+    "encode_mp3": (_tone_for, encode_mp3),
+}
+
+
+def run_case(func: Callable, arg, chars: int, repeat: int) -> dict:
+    """워밍업 1회(뱅크 로드 등) 후 repeat 회 시간 측정, 별도 1회로 피크 메모리 측정"""
+    func(arg)
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+
+    # tracemalloc 은 실행을 느리게 하므로 시간 측정과 분리
+    tracemalloc.start()
+    try:
+        func(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(times)
+    return {
+        "chars": chars,
+        "median_s": median,
+        "min_s": min(times),
+        "peak_kb": peak / 1024,
+        "chars_per_s": chars / median if median > 0 else None,
+    }
+
+
+def run_benchmarks(engines: List[str], sizes: List[int], langs: List[str], repeat: int) -> Dict[str, dict]:
+    results = {}
+    for engine in engines:
+        prepare, func = BENCHMARKS[engine]
+        for lang in langs:
+            for size in sizes:
+                key = f"{engine}/{lang}/{size}"
+                text = make_text(lang, size)
+                try:
+                    results[key] = run_case(func, prepare(text), len(text), repeat)
+                except Exception as e:
+                    print(f"[경고] {key} 측정 실패 → {e}")
+                    results[key] = {"chars": len(text), "error": str(e)}
+                    continue
+                r = results[key]
+                print(
+                    f"{key:<24} {r['median_s'] * 1000:10.2f} ms  "
+                    f"{r['peak_kb']:10.1f} KB  {r['chars_per_s'] or 0:12.0f} chars/s"
+                )
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """기준값보다 threshold 넘게 느려진 항목 목록"""
+    regressions = []
+    print(f"\n기준값 비교 (허용 {threshold:.0%})")
+    for key, r in results.items():
+        base = baseline.get(key)
+        if not base or "median_s" not in base or "median_s" not in r:
+            continue
+        ratio = r["median_s"] / base["median_s"] if base["median_s"] > 0 else 1.0
+        flag = ""
+        if ratio > 1 + threshold and r["median_s"] - base["median_s"] > MIN_DELTA_S:
+            flag = "  ← REGRESSION"
+            regressions.append(key)
+        print(f"{key:<24} {base['median_s'] * 1000:10.2f} → {r['median_s'] * 1000:10.2f} ms  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def load_json(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_json(path: str, results: Dict[str, dict]):
+    payload = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="음성 엔진 / 인코더 마이크로 벤치마크")
+    parser.add_argument("--engines", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES, help="입력 글자 수")
+    parser.add_argument("--langs", nargs="+", choices=LANGS, default=LANGS)
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="항목별 반복 횟수")
+    parser.add_argument("--output", default=RESULTS_PATH, help="결과 JSON 경로")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="기준값 JSON 경로")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준값으로 저장")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="회귀로 볼 느려짐 비율")
+    args = parser.parse_args()
+
+    if {"nook", "nook_table"} & set(args.engines) and not len(get_nook_bank()):
+        print("[경고] 너굴 글자 뱅크가 비어 있음 → 무음만 측정됨 (ffmpeg 또는 nook_bank.npz 필요)")
+
+    results = run_benchmarks(args.engines, args.sizes, args.langs, args.repeat)
+    save_json(args.output, results)
+    print(f"\n결과 저장: {args.output}")
+
+    if args.save_baseline:
+        save_json(args.baseline, results)
+        print(f"기준값 저장: {args.baseline}")
+        return
+
+    baseline = load_json(args.baseline)
+    if baseline is None:
+        print(f"기준값 없음: {args.baseline} (--save-baseline 으로 만들 수 있음)")
+        return
+    regressions = compare(results, baseline["results"], args.threshold)
+    if regressions:
+        print(f"\n회귀 {len(regressions)}건: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
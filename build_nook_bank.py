@@ -0,0 +1,94 @@
+# build_nook_bank.py
+"""
+너굴 음성용 글자 뱅크를 미리 만들어 두는 스크립트 (배포 전에 한 번 실행)
+
+    python build_nook_bank.py            # KS X 1001 완성형 2,350자 + 영문 대소문자
+    python build_nook_bank.py --all      # 유니코드 한글 음절 11,172자 전체
+
+- samples/{글자}.mp3 가 있고 디코딩되면 재사용, 없거나 깨진 글자만 gTTS 로 받음 (중단 후 재실행 가능)
+- 무음 제거 + 정규화 후 samples/nook_bank.npz 하나로 저장 → 앱은 시작 시 이 파일만 읽음
+"""
+import argparse
+import os
+import string
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from get_nook import BANK_PATH, SAMPLE_DIR, decode_sample, fetch_sample, save_bank_file
+
+
+def ksx1001_syllables():
+    """KS X 1001 완성형 한글 2,350자 (EUC-KR 0xB0A1 ~ 0xC8FE)"""
+    letters = []
+    for lead in range(0xB0, 0xC9):
+        for trail in range(0xA1, 0xFF):
+            try:
+                letters.append(bytes([lead, trail]).decode("euc-kr"))
+            except UnicodeDecodeError:
+                continue
+    return letters
+
+
+def all_syllables():
+    """유니코드 한글 음절 11,172자 ('가' ~ '힣')"""
+    return [chr(code) for code in range(ord('가'), ord('힣') + 1)]
+
+
+def fetch_letter(letter, sample_dir, lang="ko", retries=3):
+    """
+    samples/{letter}.mp3 → 디코딩한 (PCM, frame_rate)
+        - 비어 있지 않고 디코딩되는 파일만 완료로 보고 재사용
+        - 없거나 깨진 파일(이전 실패로 남은 0바이트 등)은 gTTS 로 다시 받아 교체 (임시 파일 → os.replace)
+    """
+    letter_file = os.path.join(sample_dir, f"{letter}.mp3")
+    if os.path.isfile(letter_file) and os.path.getsize(letter_file) > 0:
+        try:
+            return decode_sample(letter_file)
+        except Exception as e:
+            print(f"[경고] {letter_file} 디코딩 실패, 다시 받음 → {e}")
+    last_error = None
+    for _ in range(retries):
+        try:
+            return fetch_sample(letter, letter_file, lang)
+        except Exception as e:
+            last_error = e
+    raise RuntimeError(f"TTS 생성 실패: {letter} - {last_error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="너굴 음성 글자 뱅크 빌드")
+    parser.add_argument("--all", action="store_true", help="한글 음절 11,172자 전체 생성")
+    parser.add_argument("--no-latin", action="store_true", help="영문 대소문자 제외")
+    parser.add_argument("--lang", default="ko")
+    parser.add_argument("--sample-dir", default=SAMPLE_DIR)
+    parser.add_argument("--output", default=BANK_PATH)
+    parser.add_argument("--workers", type=int, default=8, help="gTTS 동시 요청 수")
+    args = parser.parse_args()
+
+    letters = all_syllables() if args.all else ksx1001_syllables()
+    if not args.no_latin:
+        letters += list(string.ascii_letters)
+    os.makedirs(args.sample_dir, exist_ok=True)
+
+    # 1. 있는 파일은 디코딩, 없거나 깨진 글자만 gTTS 로 병렬 다운로드 + 무음 제거 + 정규화
+    samples, failed = {}, []
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(fetch_letter, ch, args.sample_dir, args.lang): ch for ch in letters}
+        for i, future in enumerate(as_completed(futures), 1):
+            letter = futures[future]
+            try:
+                samples[letter] = future.result()
+            except Exception as e:
+                failed.append(letter)
+                print(f"[경고] {e}")
+            if i % 100 == 0 or i == len(letters):
+                print(f"준비 {i}/{len(letters)}")
+
+    # 2. 하나의 뱅크 파일로 저장
+    save_bank_file(args.output, samples)
+    print(f"저장 완료: {args.output} ({len(samples)}자, 실패 {len(failed)}자)")
+    if failed:
+        print("실패한 글자:", "".join(failed))
+
+
+if __name__ == "__main__":
+    main()
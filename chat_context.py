@@ -0,0 +1,172 @@
+# chat_context.py
+"""
+세션별 대화 히스토리를 LLM 에 보낼 때 길이를 제한하는 정책
+
+- "all"    : 전체 히스토리 (기존 동작)
+- "last_n" : 최근 N 턴만 (기본)
+- "tokens" : 최근 메시지부터 토큰 예산 안에 들어가는 만큼
+- "summary": 오래된 대화는 백그라운드에서 요약해 두고, 요약 + 최근 N 턴만
+
+환경변수
+    CHAT_CONTEXT_POLICY=last_n
+    CHAT_CONTEXT_TURNS=10
+    CHAT_CONTEXT_TOKENS=2000
+    CHAT_SUMMARY_MODEL=gpt-4.1-nano
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, SystemMessage
+
+CHAT_CONTEXT_POLICY = os.getenv("CHAT_CONTEXT_POLICY", "last_n")
+CHAT_CONTEXT_TURNS = int(os.getenv("CHAT_CONTEXT_TURNS", "10"))
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "2000"))
+CHAT_SUMMARY_MODEL = os.getenv("CHAT_SUMMARY_MODEL", "gpt-4.1-nano")
+MAX_TRACKED_SESSIONS = 1000  # 요약 상태를 들고 있는 최대 세션 수
+
+SUMMARY_PROMPT = """
+다음은 사용자와 AI 의 이전 대화입니다. 이후 대화에 필요한 사실(이름, 선호, 약속, 주제 등)만
+한국어로 5문장 이내로 요약하세요.
+
+[기존 요약]
+{summary}
+
+[대화]
+{dialogue}
+"""
+
+
+def current_session_id() -> str:
+    """현재 Streamlit 세션 ID (스크립트 밖이면 'default')"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return "default"
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "default"
+
+
+_ENCODING = None
+
+
+def estimate_tokens(text: str) -> int:
+    """tiktoken 이 있으면 정확히, 없으면 대략 (한글은 글자당 1토큰 정도)"""
+    global _ENCODING
+    if _ENCODING is None:
+        try:
+            import tiktoken
+            _ENCODING = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _ENCODING = False
+    if _ENCODING:
+        return len(_ENCODING.encode(text))
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def last_n_turns(messages: List[BaseMessage], turns: int) -> List[BaseMessage]:
+    return messages[-turns * 2:] if turns > 0 else []
+
+
+def within_token_budget(messages: List[BaseMessage], budget: int) -> List[BaseMessage]:
+    """뒤에서부터 예산을 넘기 직전까지"""
+    kept, used = [], 0
+    for message in reversed(messages):
+        used += estimate_tokens(message.content) + 4  # 메시지당 역할 토큰 여유
+        if used > budget:
+            break
+        kept.append(message)
+    return kept[::-1]
+
+
+class ContextWindow:
+    """
+    ➡ RunnableWithMessageHistory 가 채운 'history' 를 정책에 맞게 잘라 주는 체인 단계
+       chain = RunnableLambda(ContextWindow()) | prompt | llm | parser
+    """
+
+    def __init__(self, policy: str = CHAT_CONTEXT_POLICY, turns: int = CHAT_CONTEXT_TURNS,
+                 max_tokens: int = CHAT_CONTEXT_TOKENS, summary_model: str = CHAT_SUMMARY_MODEL):
+        self.policy = policy
+        self.turns = turns
+        self.max_tokens = max_tokens
+        self.summary_model = summary_model
+        # session_id → (요약, 요약에 포함된 메시지 수)
+        self._summaries: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._compacting = set()
+        self._lock = threading.Lock()
+        self._summarizer = None
+
+    def __call__(self, inputs: dict, config: Optional[dict] = None) -> dict:
+        history = list(inputs.get("history", []))
+        if self.policy == "last_n":
+            history = last_n_turns(history, self.turns)
+        elif self.policy == "tokens":
+            history = within_token_budget(history, self.max_tokens)
+        elif self.policy == "summary":
+            session_id = ((config or {}).get("configurable") or {}).get("session_id", "default")
+            history = self._with_summary(session_id, history)
+        return {**inputs, "history": history}
+
+    # ---------------------------------------------------------------- summary
+    def _with_summary(self, session_id: str, history: List[BaseMessage]) -> List[BaseMessage]:
+        with self._lock:
+            summary, covered = self._summaries.get(session_id, ("", 0))
+            if covered > len(history):  # 대화 초기화됨
+                summary, covered = "", 0
+                self._summaries.pop(session_id, None)
+
+        keep = self.turns * 2
+        # 요약되지 않은 부분이 2배를 넘으면 오래된 쪽을 백그라운드에서 요약
+        if len(history) - covered > keep * 2:
+            self._compact_async(session_id, summary, history[covered:len(history) - keep], len(history) - keep)
+
+        recent = history[covered:]
+        if len(recent) > keep * 2:  # 요약이 끝나기 전이면 일단 최근 것만
+            recent = recent[-keep * 2:]
+        if summary:
+            return [SystemMessage(content=f"이전 대화 요약: {summary}")] + recent
+        return recent
+
+    def _compact_async(self, session_id: str, summary: str, messages: List[BaseMessage], covered: int):
+        with self._lock:
+            if session_id in self._compacting:
+                return
+            self._compacting.add(session_id)
+
+        def run():
+            try:
+                dialogue = "\n".join(f"{m.type}: {m.content}" for m in messages)
+                new_summary = self._get_summarizer().invoke(
+                    SUMMARY_PROMPT.format(summary=summary or "(없음)", dialogue=dialogue)
+                ).content.strip()
+                with self._lock:
+                    self._summaries[session_id] = (new_summary, covered)
+                    self._summaries.move_to_end(session_id)
+                    while len(self._summaries) > MAX_TRACKED_SESSIONS:
+                        self._summaries.popitem(last=False)
+            except Exception as e:
+                print(f"[경고] 대화 요약 실패 → {e}")
+            finally:
+                with self._lock:
+                    self._compacting.discard(session_id)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _get_summarizer(self):
+        if self._summarizer is None:
+            from llm_clients import get_chat_llm
+            self._summarizer = get_chat_llm(self.summary_model, 0)
+        return self._summarizer
+
+
+_WINDOW: Optional[ContextWindow] = None
+
+
+def get_context_window() -> ContextWindow:
+    """프로세스 전역 ContextWindow (세션별 요약 상태를 공유 보관)"""
+    global _WINDOW
+    if _WINDOW is None:
+        _WINDOW = ContextWindow()
+    return _WINDOW
@@ -1,46 +1,133 @@
 # edie.py
 import os
 import random
-from typing import Optional
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
 
 from pydub import AudioSegment
 
+from sound_bank import get_sound_bank
+from voice_rng import make_rng
+
 # ------------------------------------------------------------------------
 # 환경 경로 설정
 # ------------------------------------------------------------------------
 BASE_DIR = os.path.dirname(__file__)
 SOUND_ROOT = os.path.join(BASE_DIR, "new_emotion_sounds")  # ← 필요하면 변경
 DEFAULT_EMOTION = "neutral"                                # 하위 폴더 이름
+EMOTIONS = ("neutral", "positive", "negative")             # 지원하는 감정 (negative 는 strong / weak 하위 폴더)
 DEFAULT_RATE = 44_100                                      # Hz
+CHANNELS = 2                                               # 음원이 스테레오라 그대로 맞춤
+SAMPLE_WIDTH = 2                                           # 16bit
+MTIME_CHECK_INTERVAL = 5.0                                 # 폴더 mtime 재확인 주기 (초)
+
+
+class EmotionBank(NamedTuple):
+    """감정 폴더 하나를 디코딩해 둔 결과 (모두 같은 포맷의 raw PCM)"""
+    mtime: float
+    space: bytes                # '_.wav' → 공백 (packed 뱅크에서는 mmap view)
+    sounds: Tuple[bytes, ...]   # 나머지 .wav
+
+
+_BANKS: Dict[Tuple[str, int], EmotionBank] = {}
+_CHECKED_AT: Dict[Tuple[str, int], float] = {}
+_BANK_LOCK = threading.Lock()
 
-def _scan_emotion_folder(emotion: str = DEFAULT_EMOTION):
+
+def _emotion_path(emotion: str, rng: random.Random) -> str:
+    """negative 는 strong / weak 중 하나를 무작위로 고름 (이미 'negative/strong' 처럼 정해졌으면 그대로)"""
+    if emotion == "negative":
+        sub = rng.choice(["strong", "weak"])   # 필요하면 "week" 로 변경
+        return os.path.join(emotion, sub)         # 예: negative/strong
+    return emotion
+
+
+def pick_emotion_bank(emotion: str, text: str) -> str:
     """
-    (1) '_'(언더바) WAV ↔ 공백, (2) 나머지 WAV 파일 리스트를 반환
-        - 폴더 구조: new_emotion_sounds/{emotion}/*.wav
+    답변 하나에 쓸 음원 폴더를 한 번만 정함 (문장 단위로 합성해도 strong / weak 가 섞이지 않도록)
+        - 결과를 generate_edie_voice 의 emotion 으로 그대로 넘기면 됨
     """
-    if emotion == "negative":
-        sub = random.choice(["strong", "weak"])   # 필요하면 "week" 로 변경
-        emotion_path = os.path.join(emotion, sub) # 예: negative/strong
-    else:
-        emotion_path = emotion    
-        
-    target_dir = os.path.join(SOUND_ROOT, emotion_path)
-    if not os.path.isdir(target_dir):
-        raise FileNotFoundError(f"폴더 없음: {target_dir}")
+    return _emotion_path(emotion, make_rng(None, "edie-bank", text, emotion))
+
+
+def _decode_wav(path: str, normalize_rate: int) -> bytes:
+    seg = AudioSegment.from_wav(path)
+    seg = seg.set_frame_rate(normalize_rate).set_channels(CHANNELS).set_sample_width(SAMPLE_WIDTH)
+    return seg.raw_data
 
+
+def _scan_emotion_folder(target_dir: str, normalize_rate: int, mtime: float) -> EmotionBank:
+    """
+    (1) '_'(언더바) WAV ↔ 공백, (2) 나머지 WAV 들을 디코딩해 EmotionBank 로 반환
+        - 폴더 구조: new_emotion_sounds/{emotion}/*.wav
+    """
     underscore_wav = os.path.join(target_dir, "_.wav")
     if not os.path.isfile(underscore_wav):
         raise FileNotFoundError("'_.wav' 가 없습니다 → 공백용 음원 필요")
 
-    normal_wavs = [
+    normal_wavs = sorted(
         os.path.join(target_dir, f)
         for f in os.listdir(target_dir)
         if f.endswith(".wav") and f != "_.wav"
-    ]
+    )
     if not normal_wavs:
         raise FileNotFoundError("'_.wav' 를 제외한 .wav 파일이 없습니다")
 
-    return underscore_wav, normal_wavs
+    sounds = []
+    for wav_path in normal_wavs:
+        try:
+            sounds.append(_decode_wav(wav_path, normalize_rate))
+        except Exception as e:
+            print(f"[경고] {wav_path} 로드 실패 → {e}")
+    return EmotionBank(mtime, _decode_wav(underscore_wav, normalize_rate), tuple(sounds))
+
+
+def _packed_emotion_bank(emotion_path: str, normalize_rate: int) -> Optional[EmotionBank]:
+    """packed 사운드 뱅크에 같은 포맷으로 들어 있으면 mmap view 로 EmotionBank 구성"""
+    packed = get_sound_bank()
+    if packed is None:
+        return None
+    entries = packed.items(f"edie/{emotion_path.replace(os.sep, '/')}/")
+    space = entries.pop("_", None)
+    if space is None or not entries:
+        return None
+    if any(e.rate != normalize_rate or e.channels != CHANNELS for e in (space, *entries.values())):
+        return None
+    # 폴더에서 읽을 때처럼 이름순 (같은 시드면 같은 음원)
+    return EmotionBank(0.0, memoryview(space.pcm), tuple(memoryview(entries[k].pcm) for k in sorted(entries)))
+
+
+def get_emotion_bank(emotion_path: str, normalize_rate: int = DEFAULT_RATE) -> EmotionBank:
+    """
+    프로세스 전역 감정 음원 뱅크
+        - packed 사운드 뱅크가 있으면 그대로 사용 (폴더 확인 안 함)
+        - 폴더 mtime 이 바뀌었을 때만 다시 디코딩
+        - mtime 확인도 MTIME_CHECK_INTERVAL 마다 한 번만 (그 사이엔 파일시스템 접근 없음)
+    """
+    key = (emotion_path, normalize_rate)
+    bank = _BANKS.get(key)
+    now = time.monotonic()
+    if bank is not None and now - _CHECKED_AT.get(key, 0.0) < MTIME_CHECK_INTERVAL:
+        return bank
+
+    with _BANK_LOCK:
+        packed = _packed_emotion_bank(emotion_path, normalize_rate)
+        if packed is not None:
+            _BANKS[key] = packed
+            _CHECKED_AT[key] = float("inf")
+            return packed
+
+        target_dir = os.path.join(SOUND_ROOT, emotion_path)
+        if not os.path.isdir(target_dir):
+            raise FileNotFoundError(f"폴더 없음: {target_dir}")
+        mtime = os.stat(target_dir).st_mtime
+        bank = _BANKS.get(key)
+        if bank is None or bank.mtime != mtime:
+            bank = _scan_emotion_folder(target_dir, normalize_rate, mtime)
+            _BANKS[key] = bank
+        _CHECKED_AT[key] = now
+        return bank
 
 
 def generate_edie_voice(
@@ -52,33 +139,33 @@ def generate_edie_voice(
     """
     ➡ 텍스트를 EDIE sound 로 합성해 AudioSegment 로 반환
        - 같은 문장 안에서는 같은 글자 ↔ 같은 음원(고정 랜덤)
-       - `emotion` 폴더 안의 .wav 들을 사용
+       - `emotion` 폴더 안의 .wav 들을 사용 (디코딩된 뱅크에서 골라 이어 붙이기만 함)
+       - random_seed 가 없으면 텍스트 / 감정으로 정해지므로 같은 요청은 항상 같은 음성
+         (전역 random 을 건드리지 않아 동시에 합성해도 안전)
+       - emotion 에 pick_emotion_bank 결과('negative/strong' 등)를 주면 그 폴더를 그대로 사용
     """
     if not text.strip():
         return None
 
-    # 고정 랜덤 시드(선택)
-    if random_seed is not None:
-        random.seed(random_seed)
-
-    underscore_wav, normal_wavs = _scan_emotion_folder(emotion)
+    rng = make_rng(random_seed, "edie", text, emotion, normalize_rate)
+    bank = get_emotion_bank(_emotion_path(emotion, rng), normalize_rate)
+    if not bank.sounds:
+        return None
 
-    char2wav = {}           # 고정 매핑
-    result = None           # 최종 AudioSegment
+    char2sound = {}         # 고정 매핑
+    chunks = []
 
     for ch in text:
         if ch == " ":
-            wav_path = underscore_wav
+            chunks.append(bank.space)
         else:
-            if ch not in char2wav:
-                char2wav[ch] = random.choice(normal_wavs)
-            wav_path = char2wav[ch]
-
-        try:
-            seg = AudioSegment.from_wav(wav_path)
-            seg = seg.set_frame_rate(normalize_rate)
-            result = seg if result is None else result + seg
-        except Exception as e:
-            print(f"[경고] {wav_path} 로드 실패 → {e}")
+            if ch not in char2sound:
+                char2sound[ch] = rng.choice(bank.sounds)
+            chunks.append(char2sound[ch])
 
-    return result
+    return AudioSegment(
+        b"".join(chunks),
+        sample_width=SAMPLE_WIDTH,
+        frame_rate=normalize_rate,
+        channels=CHANNELS,
+    )
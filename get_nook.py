@@ -0,0 +1,465 @@
+# nook.py
+import os
+import random
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from pydub import AudioSegment
+
+from latency_metrics import increment
+from sound_bank import get_sound_bank
+from voice_rng import make_rng
+
+# ------------------------------------------------------------------------
+# 환경 경로 설정
+# ------------------------------------------------------------------------
+BASE_DIR = os.path.dirname(__file__)
+SAMPLE_DIR = os.path.join(BASE_DIR, "samples")  # 글자별 mp3 (예: samples/가.mp3)
+BANK_PATH = os.path.join(SAMPLE_DIR, "nook_bank.npz")  # build_nook_bank.py 로 미리 만든 뱅크
+DEFAULT_RATE = 44_100                           # Hz
+TRIM_FRAME_MS = 10                              # 무음 판정 프레임 길이
+TRIM_THRESHOLD_DB = -35.0                       # 최대 에너지 대비 이 값보다 작으면 무음
+SPACE_MS = 200                                  # 공백 → 0.2초 무음
+SHORT_SILENCE_MS = 150                          # 특수문자/숫자 → 0.15초 무음
+NORMALIZE_PEAK = 0.89                           # 정규화 목표 피크 (약 -1 dBFS)
+NOOK_ENGINE = os.getenv("NOOK_ENGINE", "numpy") # "numpy" | "table" | "pydub"
+NOOK_PITCH_BUCKETS = int(os.getenv("NOOK_PITCH_BUCKETS", "8"))               # table 엔진: 음높이 단계 수 K
+NOOK_VARIANT_BUDGET_MB = float(os.getenv("NOOK_VARIANT_BUDGET_MB", "64"))    # table 엔진: 변형 테이블 메모리 상한
+NOOK_ALLOW_GTTS = os.getenv("NOOK_ALLOW_GTTS", "auto")  # 없는 글자를 gTTS 로 받을지: "1" | "0" | "auto" (빌드된 뱅크가 없을 때만)
+ALLOW_GTTS = {"1": True, "0": False}.get(NOOK_ALLOW_GTTS)  # None → load() 에서 뱅크 유무로 결정
+
+
+def trim_silence(
+    pcm: np.ndarray,
+    frame_rate: int,
+    threshold_db: float = TRIM_THRESHOLD_DB,
+    frame_ms: int = TRIM_FRAME_MS,
+) -> np.ndarray:
+    """
+    앞뒤 무음 제거 (프레임 RMS 에너지 기준)
+        - 가장 큰 프레임 에너지보다 threshold_db 이상 작은 앞/뒤 프레임을 잘라냄
+    """
+    frame = max(1, frame_rate * frame_ms // 1000)
+    n_frames = len(pcm) // frame
+    if n_frames == 0:
+        return pcm
+    frames = pcm[:n_frames * frame].astype(np.float32).reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    peak = rms.max()
+    if peak <= 0:
+        return pcm
+    active = np.flatnonzero(rms >= peak * 10 ** (threshold_db / 20))
+    start = active[0] * frame
+    end = min(len(pcm), (active[-1] + 1) * frame)
+    return pcm[start:end]
+
+
+def normalize_peak(pcm: np.ndarray, peak: float = NORMALIZE_PEAK) -> np.ndarray:
+    """글자마다 음량이 들쭉날쭉하지 않도록 피크 기준 정규화"""
+    current = np.abs(pcm.astype(np.int32)).max() if len(pcm) else 0
+    if current == 0:
+        return pcm
+    gain = peak * 32767 / current
+    return np.clip(pcm.astype(np.float32) * gain, -32768, 32767).astype(np.int16)
+
+
+def decode_sample(path: str) -> Tuple[np.ndarray, int]:
+    """mp3/wav 파일 → (mono int16 PCM, frame_rate), 무음 제거 + 정규화 포함"""
+    seg = AudioSegment.from_file(path)
+    seg = seg.set_channels(1).set_sample_width(2)
+    pcm = np.frombuffer(seg.raw_data, dtype=np.int16)
+    return normalize_peak(trim_silence(pcm, seg.frame_rate)), seg.frame_rate
+
+
+def fetch_sample(letter: str, letter_file: str, lang: str = "ko") -> Tuple[np.ndarray, int]:
+    """
+    gTTS 로 글자 음원을 받아 디코딩한 뒤 letter_file 로 저장
+        - 같은 폴더의 임시 파일에 받고 디코딩까지 성공해야 os.replace
+          (네트워크 / ffmpeg 오류로 실패해도 빈 파일이나 반쯤 쓴 파일이 남지 않음)
+    """
+    from gtts import gTTS  # 없는 글자를 받을 때만 필요 (requests 등 import 비용)
+    fd, tmp = tempfile.mkstemp(prefix=f".{letter}.", suffix=".mp3", dir=os.path.dirname(letter_file) or ".")
+    os.close(fd)
+    try:
+        gTTS(letter, lang=lang).save(tmp)
+        sample = decode_sample(tmp)
+        os.replace(tmp, letter_file)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return sample
+
+
+def save_bank_file(path: str, samples: Dict[str, Tuple[np.ndarray, int]]):
+    """
+    글자별 PCM 을 하나의 npz 로 저장
+        - pcm: 모든 글자를 이어 붙인 int16 배열 / letters, offsets, lengths, rates: 인덱스
+    """
+    letters = sorted(samples)
+    lengths = np.array([len(samples[k][0]) for k in letters], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    np.savez(
+        path,
+        pcm=np.concatenate([samples[k][0] for k in letters]) if letters else np.zeros(0, np.int16),
+        letters=np.array(letters, dtype=str),
+        offsets=offsets,
+        lengths=lengths,
+        rates=np.array([samples[k][1] for k in letters], dtype=np.int64),
+    )
+
+
+def load_bank_file(path: str) -> Dict[str, Tuple[np.ndarray, int]]:
+    """save_bank_file 로 만든 npz → {글자: (PCM view, frame_rate)}"""
+    with np.load(path) as data:
+        pcm = data["pcm"]
+        return {
+            str(letter): (pcm[offset:offset + length], int(rate))
+            for letter, offset, length, rate in zip(
+                data["letters"], data["offsets"], data["lengths"], data["rates"]
+            )
+        }
+
+
+class NookSampleBank:
+    """
+    ➡ samples/ 폴더의 글자별 음원을 프로세스당 한 번만 디코딩해 메모리에 보관
+       - packed 사운드 뱅크(sound_bank.pcm, mmap) → nook_bank.npz → 빠진 글자만 mp3 디코딩 순서
+       - 합성 시에는 dict 조회만 (ffmpeg 서브프로세스 없음)
+       - 없는 글자는 gTTS 로 한 번 받아 저장 후 뱅크에 추가 (글자당 한 번만 시도)
+         allow_gtts=None 이면 빌드된 뱅크(packed / nook_bank.npz)가 없을 때만 받음
+       - samples/ 에 이미 있는 파일(디코딩 실패 등)은 덮어쓰지 않음
+       - 음원이 없어 건너뛰는 글자가 생기면 프로세스당 한 번 경고
+    """
+
+    def __init__(
+        self,
+        sample_dir: str = SAMPLE_DIR,
+        bank_path: str = BANK_PATH,
+        allow_gtts: Optional[bool] = ALLOW_GTTS,
+        use_packed: bool = True,
+    ):
+        self.sample_dir = sample_dir
+        self.bank_path = bank_path
+        self.allow_gtts = allow_gtts
+        self.use_packed = use_packed
+        self._samples: Dict[str, Tuple[np.ndarray, int]] = {}
+        self._unavailable = set()  # gTTS 로도 못 구한 글자 (다시 시도하지 않음)
+        self._warned = False       # 건너뛰는 글자 경고를 이미 출력했는지
+        self._lock = threading.Lock()
+
+    def load(self) -> "NookSampleBank":
+        os.makedirs(self.sample_dir, exist_ok=True)
+        built = False
+        packed = get_sound_bank() if self.use_packed else None
+        if packed is not None:
+            for letter, entry in packed.items("nook/").items():
+                self._samples[letter] = (entry.pcm, entry.rate)
+                built = True
+        if self.bank_path and os.path.isfile(self.bank_path):
+            try:
+                for letter, sample in load_bank_file(self.bank_path).items():
+                    self._samples.setdefault(letter, sample)
+                built = True
+            except Exception as e:
+                print(f"[경고] {self.bank_path} 로드 실패 → {e}")
+        if self.allow_gtts is None:
+            # 빌드된 뱅크가 없으면 samples/ 의 mp3 만으로는 대부분의 글자가 빠지므로 gTTS 로 채움
+            self.allow_gtts = not built
+        for name in sorted(os.listdir(self.sample_dir)):
+            letter, ext = os.path.splitext(name)
+            if ext.lower() not in (".mp3", ".wav") or len(letter) != 1:
+                continue
+            if letter in self._samples:
+                continue
+            try:
+                self._samples[letter] = decode_sample(os.path.join(self.sample_dir, name))
+            except Exception as e:
+                print(f"[경고] {name} 로드 실패 → {e}")
+        return self
+
+    def __contains__(self, letter: str) -> bool:
+        return letter in self._samples
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def items(self):
+        return self._samples.items()
+
+    def _missing(self, letter: str) -> None:
+        """음원이 없어 글자를 건너뜀 (경고는 처음 한 번만)"""
+        increment("nook_letter_missing")
+        if not self._warned:
+            self._warned = True
+            reason = "gTTS 로 받지 못함" if self.allow_gtts else "gTTS 사용 안 함"
+            print(f"[경고] 너굴 음원이 없는 글자는 건너뜀 ({reason}, build_nook_bank.py 로 뱅크 생성 권장) → 예: {letter}")
+        return None
+
+    def get(self, letter: str, lang: str = "ko") -> Optional[Tuple[np.ndarray, int]]:
+        """글자 음원 조회 (없으면 gTTS 로 생성 후 추가)"""
+        sample = self._samples.get(letter)
+        if sample is not None:
+            return sample
+        if not self.allow_gtts:
+            return self._missing(letter)
+        with self._lock:
+            if letter in self._samples:
+                return self._samples[letter]
+            if letter in self._unavailable:
+                return self._missing(letter)
+            letter_file = os.path.join(self.sample_dir, f"{letter}.mp3")
+            if os.path.exists(letter_file):
+                # 파일은 있는데 load() 에서 디코딩하지 못함 (ffmpeg 없음 등) → 받은 음원을 덮어쓰지 않음
+                self._unavailable.add(letter)
+                return self._missing(letter)
+            increment("nook_gtts_fetch")
+            try:
+                self._samples[letter] = fetch_sample(letter, letter_file, lang)
+            except Exception as e:
+                self._unavailable.add(letter)
+                print(f"[경고] TTS 생성 실패: {letter} → {e}")
+                return self._missing(letter)
+        return self._samples[letter]
+
+
+_BANK: Optional[NookSampleBank] = None
+_BANK_LOCK = threading.Lock()
+
+
+def get_nook_bank() -> NookSampleBank:
+    """프로세스 전역 샘플 뱅크 (최초 호출 시 한 번 로드)"""
+    global _BANK
+    if _BANK is None:
+        with _BANK_LOCK:
+            if _BANK is None:
+                _BANK = NookSampleBank().load()
+    return _BANK
+
+
+def _is_voiced(letter: str) -> bool:
+    """한글 또는 영문이면 음원 재생, 아니면(특수문자/숫자) 무음"""
+    return letter.isalpha() or '가' <= letter <= '힣'
+
+
+def _generate_nook_voice_pydub(text, rng: random.Random, lang='ko', random_factor=0.35, normal_frame_rate=DEFAULT_RATE):
+    """pydub 엔진: 글자마다 set_frame_rate 후 이어 붙임 (비교/검증용)"""
+    bank = get_nook_bank()
+    result_sound = None
+    space_silence = AudioSegment.silent(duration=SPACE_MS)  # 0.2초 무음
+    short_silence = AudioSegment.silent(duration=SHORT_SILENCE_MS)  # 0.15초 짧은 무음
+
+    for letter in text:
+        if letter == ' ':  # 공백
+            new_sound = space_silence
+        elif not _is_voiced(letter):  # 특수문자/숫자
+            new_sound = short_silence
+        else:
+            sample = bank.get(letter, lang)
+            if sample is None:
+                continue
+            pcm, sample_rate = sample
+
+            octaves = 1.5 + rng.random() * random_factor
+            frame_rate = int(sample_rate * (2.5 ** octaves))
+            new_sound = AudioSegment(
+                pcm.tobytes(), sample_width=2, frame_rate=frame_rate, channels=1
+            )
+
+        new_sound = new_sound.set_frame_rate(normal_frame_rate)
+        result_sound = new_sound if result_sound is None else result_sound + new_sound
+
+    return result_sound
+
+
+def _generate_nook_voice_numpy(text, rng: random.Random, lang='ko', random_factor=0.35, normal_frame_rate=DEFAULT_RATE):
+    """
+    numpy 엔진: 음높이 변경 + 리샘플을 한 번의 선형 보간으로 처리
+        - 1단계: 글자별 재생 속도와 출력 길이를 계산
+        - 2단계: 전체 길이의 int16 버퍼를 한 번만 할당하고 각 글자를 제자리에 기록
+    """
+    bank = get_nook_bank()
+    space_len = normal_frame_rate * SPACE_MS // 1000
+    short_len = normal_frame_rate * SHORT_SILENCE_MS // 1000
+
+    # (pcm 또는 None=무음, 입력 샘플 간격, 출력 길이)
+    plan = []
+    for letter in text:
+        if letter == ' ':
+            plan.append((None, 0.0, space_len))
+        elif not _is_voiced(letter):
+            plan.append((None, 0.0, short_len))
+        else:
+            sample = bank.get(letter, lang)
+            if sample is None:
+                continue
+            pcm, sample_rate = sample
+            octaves = 1.5 + rng.random() * random_factor
+            step = _pitch_step(sample_rate, octaves, normal_frame_rate)
+            plan.append((pcm, step, int(len(pcm) / step)))
+
+    total = sum(length for _, _, length in plan)
+    if total == 0:
+        return None
+
+    out = np.zeros(total, dtype=np.int16)  # 무음 구간은 0 그대로 둠
+    pos = 0
+    for pcm, step, length in plan:
+        if pcm is not None and length > 0:
+            out[pos:pos + length] = _resample(pcm, step, length)
+        pos += length
+
+    return AudioSegment(out.tobytes(), sample_width=2, frame_rate=normal_frame_rate, channels=1)
+
+
+def _pitch_step(sample_rate: int, octaves: float, normal_frame_rate: int) -> float:
+    """원본을 sample_rate * 2.5**octaves 로 재생한 뒤 normal_frame_rate 로 리샘플할 때의 입력 샘플 간격"""
+    return int(sample_rate * (2.5 ** octaves)) / normal_frame_rate
+
+
+def _resample(pcm: np.ndarray, step: float, length: int) -> np.ndarray:
+    """선형 보간으로 step 간격마다 샘플링 (length 개)"""
+    src = np.arange(length, dtype=np.float64) * step
+    return np.interp(src, np.arange(len(pcm)), pcm)
+
+
+class PitchVariantTable:
+    """
+    ➡ 글자마다 K 단계 음높이로 미리 리샘플해 둔 int16 버퍼
+       - random_factor 범위 [1.5, 1.5 + random_factor] 옥타브를 K 구간으로 나눠 각 구간 중앙값 사용
+       - 합성 시에는 구간 번호만 고르고 버퍼를 복사 (글자마다 리샘플 없음)
+       - 테이블을 만든 뒤 뱅크에 추가된 글자(gTTS)는 처음 쓸 때 만들어 넣음
+    """
+
+    def __init__(self, bank: NookSampleBank, random_factor: float, normal_frame_rate: int, buckets: int):
+        self.random_factor = random_factor
+        self.normal_frame_rate = normal_frame_rate
+        self.buckets = buckets
+        self.octaves = [1.5 + (k + 0.5) / buckets * random_factor for k in range(buckets)]
+        self.nbytes = 0
+        self._variants: Dict[str, Tuple[np.ndarray, ...]] = {}
+        self._lock = threading.Lock()
+        for letter, sample in list(bank.items()):
+            self._variants[letter] = self._render(sample)
+
+    def _render(self, sample: Tuple[np.ndarray, int]) -> Tuple[np.ndarray, ...]:
+        pcm, sample_rate = sample
+        variants = []
+        for octaves in self.octaves:
+            step = _pitch_step(sample_rate, octaves, self.normal_frame_rate)
+            variant = _resample(pcm, step, int(len(pcm) / step)).astype(np.int16)
+            variants.append(variant)
+            self.nbytes += variant.nbytes
+        return tuple(variants)
+
+    def get(self, letter: str, sample: Tuple[np.ndarray, int]) -> Tuple[np.ndarray, ...]:
+        variants = self._variants.get(letter)
+        if variants is None:
+            with self._lock:
+                variants = self._variants.get(letter)
+                if variants is None:
+                    variants = self._variants[letter] = self._render(sample)
+        return variants
+
+
+def estimate_table_bytes(bank: NookSampleBank, random_factor: float, normal_frame_rate: int, buckets: int) -> int:
+    """테이블을 만들지 않고 K 단계 테이블의 크기를 계산"""
+    total = 0
+    for _, (pcm, sample_rate) in list(bank.items()):
+        for k in range(buckets):
+            octaves = 1.5 + (k + 0.5) / buckets * random_factor
+            total += int(len(pcm) / _pitch_step(sample_rate, octaves, normal_frame_rate)) * 2
+    return total
+
+
+_TABLES: "OrderedDict[Tuple[float, int], Optional[PitchVariantTable]]" = OrderedDict()
+_TABLES_LOCK = threading.Lock()
+
+
+def get_variant_table(
+    random_factor: float,
+    normal_frame_rate: int = DEFAULT_RATE,
+    buckets: int = NOOK_PITCH_BUCKETS,
+    budget_bytes: int = int(NOOK_VARIANT_BUDGET_MB * 1024 * 1024),
+) -> Optional[PitchVariantTable]:
+    """
+    (random_factor, 출력 rate) 별 변형 테이블 (처음 쓸 때 한 번 생성)
+        - 예산 안에 들어가도록 K 를 줄이고, 1단계도 안 들어가면 None (numpy 엔진으로 대체)
+        - 테이블이 여러 개면 전체 합이 예산을 넘지 않게 오래 안 쓴 것부터 제거
+    """
+    key = (round(random_factor, 4), normal_frame_rate)
+    with _TABLES_LOCK:
+        if key in _TABLES:
+            _TABLES.move_to_end(key)
+            return _TABLES[key]
+
+        bank = get_nook_bank()
+        fit = buckets
+        while fit >= 1 and estimate_table_bytes(bank, random_factor, normal_frame_rate, fit) > budget_bytes:
+            fit -= 1
+        table = None
+        if fit >= 1:
+            table = PitchVariantTable(bank, random_factor, normal_frame_rate, fit)
+            if fit < buckets:
+                print(f"[경고] 너굴 변형 테이블 예산 부족 → 음높이 {buckets}단계 대신 {fit}단계 사용")
+        else:
+            print(f"[경고] 너굴 변형 테이블이 예산({budget_bytes >> 20}MB)에 들어가지 않음 → numpy 엔진 사용")
+        _TABLES[key] = table
+
+        used = sum(t.nbytes for t in _TABLES.values() if t is not None)
+        while used > budget_bytes and len(_TABLES) > 1:
+            _, evicted = _TABLES.popitem(last=False)
+            used -= evicted.nbytes if evicted is not None else 0
+        return table
+
+
+def _generate_nook_voice_table(text, rng: random.Random, lang='ko', random_factor=0.35, normal_frame_rate=DEFAULT_RATE):
+    """
+    table 엔진: 음높이를 K 단계로 양자화해 미리 만든 버퍼를 이어 붙임
+        - numpy 엔진과 같은 난수열을 쓰므로 같은 시드면 같은 구간의 음높이를 고름
+    """
+    table = get_variant_table(random_factor, normal_frame_rate)
+    if table is None:
+        return _generate_nook_voice_numpy(text, rng, lang, random_factor, normal_frame_rate)
+    bank = get_nook_bank()
+    space = np.zeros(normal_frame_rate * SPACE_MS // 1000, dtype=np.int16)
+    short = np.zeros(normal_frame_rate * SHORT_SILENCE_MS // 1000, dtype=np.int16)
+
+    pieces = []
+    for letter in text:
+        if letter == ' ':
+            pieces.append(space)
+        elif not _is_voiced(letter):
+            pieces.append(short)
+        else:
+            sample = bank.get(letter, lang)
+            if sample is None:
+                continue
+            bucket = min(table.buckets - 1, int(rng.random() * table.buckets))
+            pieces.append(table.get(letter, sample)[bucket])
+
+    if not pieces or not sum(len(p) for p in pieces):
+        return None
+    out = np.concatenate(pieces)  # 글자마다 복사 한 번
+    return AudioSegment(out.tobytes(), sample_width=2, frame_rate=normal_frame_rate, channels=1)
+
+
+ENGINES = {
+    "numpy": _generate_nook_voice_numpy,
+    "table": _generate_nook_voice_table,
+    "pydub": _generate_nook_voice_pydub,
+}
+
+
+def generate_nook_voice(text, lang='ko', random_factor=0.35, normal_frame_rate=DEFAULT_RATE, seed=None):
+    """
+    너굴이 스타일 음성 생성 (특수문자/숫자는 짧은 무음으로 처리)
+        - seed 가 없으면 텍스트와 파라미터로 정해지므로 같은 요청은 항상 같은 음성
+    """
+    if not text.strip():
+        return None
+    rng = make_rng(seed, "nook", text, lang, random_factor, normal_frame_rate)
+    engine = ENGINES.get(NOOK_ENGINE, _generate_nook_voice_numpy)
+    return engine(text, rng, lang=lang, random_factor=random_factor, normal_frame_rate=normal_frame_rate)
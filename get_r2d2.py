@@ -1,64 +1,120 @@
 # r2d2.py
 import wave
-import random
 import os
+import threading
+from typing import Dict, Tuple
+
 from pydub import AudioSegment
 
-def generate_r2d2_voice(text, base_dir, sample_rate=22050):
-    JUNG_DECOMP = {
-        'ㅐ': ['ㅏ', 'ㅣ'], 'ㅒ': ['ㅑ', 'ㅣ'], 'ㅔ': ['ㅓ', 'ㅣ'], 'ㅖ': ['ㅕ', 'ㅣ'],
-        'ㅚ': ['ㅗ', 'ㅣ'], 'ㅟ': ['ㅜ', 'ㅣ'], 'ㅢ': ['ㅡ', 'ㅣ'],
-        'ㅘ': ['ㅗ', 'ㅏ'], 'ㅙ': ['ㅗ', 'ㅐ'], 'ㅝ': ['ㅜ', 'ㅓ'], 'ㅞ': ['ㅜ', 'ㅔ'],
-    }
-    def split_jamo(char):
-        if not ('가' <= char <= '힣'):
-            return [char]
-        base = ord(char) - ord('가')
-        cho = base // (21*28)
-        jung = (base % (21*28)) // 28
-        jong = base % 28
-        CHOS = ['ㄱ','ㄲ','ㄴ','ㄷ','ㄸ','ㄹ','ㅁ','ㅂ','ㅃ','ㅅ','ㅆ','ㅇ','ㅈ','ㅉ','ㅊ','ㅋ','ㅌ','ㅍ','ㅎ']
-        JUNGS = ['ㅏ','ㅐ','ㅑ','ㅒ','ㅓ','ㅔ','ㅕ','ㅖ','ㅗ','ㅘ','ㅙ','ㅚ','ㅛ','ㅜ','ㅝ','ㅞ','ㅟ','ㅠ','ㅡ','ㅢ','ㅣ']
-        JONGS = ['','ㄱ','ㄲ','ㄳ','ㄴ','ㄵ','ㄶ','ㄷ','ㄹ','ㄺ','ㄻ','ㄼ','ㄽ','ㄾ','ㄿ','ㅀ','ㅁ','ㅂ','ㅄ','ㅅ','ㅆ','ㅇ','ㅈ','ㅊ','ㅋ','ㅌ','ㅍ','ㅎ']
-        res = [CHOS[cho], JUNGS[jung]]
-        if jong != 0:
-            res.append(JONGS[jong])
-        return res
-    def flatten_jamo(jamo_seq):
-        out = []
-        for j in jamo_seq:
-            if j in JUNG_DECOMP:
-                out.extend(JUNG_DECOMP[j])
-            else:
-                out.append(j)
-        return out
-
-    root = os.path.join(base_dir, "sounds_korean/{0}.wav")
-    vowels = ['ㅏ', 'ㅑ', 'ㅓ', 'ㅕ', 'ㅗ', 'ㅛ', 'ㅜ', 'ㅠ', 'ㅡ', 'ㅣ']
-    available_vowel_files = [v for v in vowels if os.path.isfile(root.format(v))]
+from sound_bank import get_sound_bank
+from voice_rng import make_rng
+
+# ------------------------------------------------------------------------
+# 한글 자모 테이블 (모듈 로드 시 한 번만 계산)
+# ------------------------------------------------------------------------
+CHOS = ['ㄱ','ㄲ','ㄴ','ㄷ','ㄸ','ㄹ','ㅁ','ㅂ','ㅃ','ㅅ','ㅆ','ㅇ','ㅈ','ㅉ','ㅊ','ㅋ','ㅌ','ㅍ','ㅎ']
+JUNGS = ['ㅏ','ㅐ','ㅑ','ㅒ','ㅓ','ㅔ','ㅕ','ㅖ','ㅗ','ㅘ','ㅙ','ㅚ','ㅛ','ㅜ','ㅝ','ㅞ','ㅟ','ㅠ','ㅡ','ㅢ','ㅣ']
+JONGS = ['','ㄱ','ㄲ','ㄳ','ㄴ','ㄵ','ㄶ','ㄷ','ㄹ','ㄺ','ㄻ','ㄼ','ㄽ','ㄾ','ㄿ','ㅀ','ㅁ','ㅂ','ㅄ','ㅅ','ㅆ','ㅇ','ㅈ','ㅊ','ㅋ','ㅌ','ㅍ','ㅎ']
+JUNG_DECOMP = {
+    'ㅐ': ['ㅏ', 'ㅣ'], 'ㅒ': ['ㅑ', 'ㅣ'], 'ㅔ': ['ㅓ', 'ㅣ'], 'ㅖ': ['ㅕ', 'ㅣ'],
+    'ㅚ': ['ㅗ', 'ㅣ'], 'ㅟ': ['ㅜ', 'ㅣ'], 'ㅢ': ['ㅡ', 'ㅣ'],
+    'ㅘ': ['ㅗ', 'ㅏ'], 'ㅙ': ['ㅗ', 'ㅐ'], 'ㅝ': ['ㅜ', 'ㅓ'], 'ㅞ': ['ㅜ', 'ㅔ'],
+}
+VOWELS = ['ㅏ', 'ㅑ', 'ㅓ', 'ㅕ', 'ㅗ', 'ㅛ', 'ㅜ', 'ㅠ', 'ㅡ', 'ㅣ']
+SOUND_DIR = "sounds_korean"
+
+
+def _flatten_jamo(jamo_seq):
+    out = []
+    for j in jamo_seq:
+        out.extend(JUNG_DECOMP.get(j, [j]))
+    return tuple(out)
+
+
+def _build_syllable_table():
+    """'가'~'힣' 11,172 음절 → 겹모음을 풀어낸 자모 튜플"""
+    table = []
+    for cho in CHOS:
+        for jung in JUNGS:
+            for jong in JONGS:
+                jamo = [cho, jung] + ([jong] if jong else [])
+                table.append(_flatten_jamo(jamo))
+    return tuple(table)
+
+
+SYLLABLE_JAMO = _build_syllable_table()
+
+
+def split_jamo(char):
+    """음절 → 자모 리스트 (겹모음 분해 포함), 한글 음절이 아니면 [char]"""
+    if not ('가' <= char <= '힣'):
+        return [char]
+    return list(SYLLABLE_JAMO[ord(char) - ord('가')])
+
+
+# ------------------------------------------------------------------------
+# sounds_korean/*.wav 프레임 캐시 (base_dir 별로 한 번만 읽음)
+# ------------------------------------------------------------------------
+_FRAME_CACHE: Dict[str, Tuple[Dict[str, bytes], Tuple[str, ...]]] = {}
+_FRAME_LOCK = threading.Lock()
+
+
+def _load_frames(base_dir):
+    """
+    자모 → wav 프레임(bytes-like), 사용 가능한 모음 목록
+        - packed 사운드 뱅크에 r2d2 음원이 있으면 mmap view 를 그대로 사용
+    """
+    cached = _FRAME_CACHE.get(base_dir)
+    if cached is not None:
+        return cached
+    with _FRAME_LOCK:
+        if base_dir in _FRAME_CACHE:
+            return _FRAME_CACHE[base_dir]
+        sound_dir = os.path.join(base_dir, SOUND_DIR)
+        frames = {}
+        packed = get_sound_bank()
+        if packed is not None:
+            frames = {key: memoryview(entry.pcm) for key, entry in packed.items("r2d2/").items()}
+        if not frames and os.path.isdir(sound_dir):
+            for name in os.listdir(sound_dir):
+                key, ext = os.path.splitext(name)
+                if ext != ".wav":
+                    continue
+                try:
+                    with wave.open(os.path.join(sound_dir, name), "rb") as f:
+                        frames[key] = f.readframes(f.getnframes())
+                except Exception as e:
+                    print(f"[경고] {name} 로드 실패 → {e}")
+        available_vowels = tuple(v for v in VOWELS if v in frames)
+        _FRAME_CACHE[base_dir] = (frames, available_vowels)
+        return _FRAME_CACHE[base_dir]
+
+
+def generate_r2d2_voice(text, base_dir, sample_rate=22050, seed=None):
+    """seed 가 없으면 텍스트로 정해지므로 같은 요청은 항상 같은 음성"""
+    frames, available_vowel_files = _load_frames(base_dir)
     if not available_vowel_files:
         raise Exception("모음 wav 파일이 없습니다! sounds_korean 폴더를 확인하세요.")
 
-    word = list(text)
-    data = b""
-    for w in word:
-        jamo_candidates = []
+    rng = make_rng(seed, "r2d2", text, sample_rate)
+    base = ord('가')
+    chunks = []
+    for w in text:
         if '가' <= w <= '힣':
-            jamo_candidates = flatten_jamo(split_jamo(w))
-        elif w in vowels or ('ㄱ' <= w <= 'ㅎ'):
-            jamo_candidates = [w]
+            jamo_candidates = SYLLABLE_JAMO[ord(w) - base]
+        elif w in VOWELS or ('ㄱ' <= w <= 'ㅎ'):
+            jamo_candidates = (w,)
         elif w == ' ':
             continue
         else:
-            jamo_candidates = [random.choice(available_vowel_files)]
-        pick = random.choice(jamo_candidates)
-        try:
-            with wave.open(root.format(pick), "rb") as f:
-                data += f.readframes(f.getnframes())
-        except Exception as e:
-            continue
+            jamo_candidates = available_vowel_files
+        pick = rng.choice(jamo_candidates)
+        chunk = frames.get(pick)
+        if chunk is not None:
+            chunks.append(chunk)
+
     audio = AudioSegment(
-        data,
+        b"".join(chunks),
         sample_width=2,
         frame_rate=sample_rate,
         channels=1
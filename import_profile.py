@@ -0,0 +1,195 @@
+# import_profile.py
+"""
+Streamlit 진입점 콜드 스타트 프로파일 (첫 화면 렌더까지 걸린 시간 + 모듈별 import 시간)
+
+    python import_profile.py                           # 전체 진입점 → import_profile.json
+    python import_profile.py --apps main.py --top 20
+    python import_profile.py --save-baseline           # 현재 결과를 기준값으로 저장
+    python import_profile.py --threshold 0.2           # 기준값 대비 20% 넘게 느려지면 회귀로 표시
+
+- 진입점마다 새 파이썬 프로세스(python -X importtime)에서 AppTest 로 첫 화면을 한 번 렌더
+    streamlit / AppTest 자체 import 는 표시를 찍고 나서 렌더를 시작하므로 앱 몫에서 빠짐
+- 측정: 프로세스 시작 → 첫 렌더 끝 (process_s), 스크립트 첫 실행 (first_render_s),
+        그중 import 에 쓴 시간 (import_s), 최상위 패키지별 import 시간 (packages_ms)
+- 콜드 측정은 잡음이 커서 --repeat 번 실행한 뒤 첫 렌더 시간이 중앙값인 실행을 사용
+- 기준값보다 느려지면 REGRESSION 으로 표시하고 종료 코드 1 반환
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_PATH = os.path.join(BASE_DIR, "import_profile.json")
+BASELINE_PATH = os.path.join(BASE_DIR, "import_profile_baseline.json")
+APPS = ["main.py", "stream_app.py", "basic.py", "pages/1_voice_chat.py"]
+THRESHOLD = 0.15    # 기준값 대비 15% 넘게 느려지면 회귀
+MIN_DELTA_S = 0.05  # 50ms 미만 차이는 측정 잡음으로 보고 무시
+MARKER = "@@first-render"
+END_MARKER = "@@rendered"  # 이후 줄 (첫 렌더 뒤 백그라운드 preload 등) 은 집계하지 않음
+
+# 자식 프로세스에서 실행: streamlit 을 올린 뒤 표시를 찍고 첫 렌더
+RUNNER = f"""
+import json, os, sys, time
+from streamlit.testing.v1 import AppTest
+sys.stderr.write("import time: {MARKER}\\n")
+sys.stderr.flush()
+start = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.secrets["OPENAI_API_KEY"] = os.environ["OPENAI_API_KEY"]
+at.run()
+elapsed = time.perf_counter() - start
+sys.stderr.write("import time: {END_MARKER}\\n")
+sys.stderr.flush()
+print(json.dumps({{"first_render_s": elapsed, "rendered_at": time.time(),
+                  "exceptions": [e.value for e in at.exception]}}))
+"""
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """두 표시 사이의 -X importtime 줄 → (모듈, 깊이, self us, cumulative us)"""
+    lines = stderr.splitlines()
+    try:
+        lines = lines[lines.index(f"import time: {MARKER}") + 1:lines.index(f"import time: {END_MARKER}")]
+    except ValueError:
+        return []
+    modules = []
+    for line in lines:
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, (len(indent) - 1) // 2, int(self_us), int(cumulative_us)))
+    return modules
+
+
+def profile_once(app: str) -> dict:
+    """새 프로세스에서 app 첫 렌더 한 번"""
+    env = dict(os.environ, NOOK_ALLOW_GTTS="0", PYTHONDONTWRITEBYTECODE="1")
+    env.setdefault("OPENAI_API_KEY", "profile")  # 키가 없어서 렌더가 일찍 끝나지 않도록 (요청은 보내지 않음)
+    launched = time.time()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", RUNNER, app],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0 or not proc.stdout.strip():
+        raise RuntimeError(f"{app} 프로파일 실패 (종료 코드 {proc.returncode})\n{proc.stderr[-2000:]}")
+    outcome = json.loads(proc.stdout.strip().splitlines()[-1])
+    process_s = outcome["rendered_at"] - launched  # 프로세스 종료가 아니라 첫 렌더가 끝난 시각까지
+
+    modules = parse_importtime(proc.stderr)
+    packages: Dict[str, int] = defaultdict(int)
+    for name, _, self_us, _ in modules:
+        packages[name.split(".")[0]] += self_us
+    top_level = [(name, cumulative_us) for name, depth, _, cumulative_us in modules if depth == 0]
+    return {
+        "process_s": round(process_s, 4),
+        "first_render_s": round(outcome["first_render_s"], 4),
+        "import_s": round(sum(us for _, us in top_level) / 1e6, 4),
+        "modules_imported": len(modules),
+        "packages_ms": {
+            name: round(us / 1000, 1) for name, us in sorted(packages.items(), key=lambda kv: -kv[1])
+        },
+        "top_level_ms": {
+            name: round(us / 1000, 1) for name, us in sorted(top_level, key=lambda kv: -kv[1])
+        },
+        "exceptions": outcome["exceptions"],
+    }
+
+
+def profile_app(app: str, repeat: int) -> dict:
+    """repeat 번 콜드 실행 → 첫 렌더 시간이 중앙값인 실행 (+ 전체 실행의 최솟값)"""
+    runs = sorted((profile_once(app) for _ in range(repeat)), key=lambda r: r["first_render_s"])
+    result = dict(runs[(len(runs) - 1) // 2])
+    result["first_render_min_s"] = runs[0]["first_render_s"]
+    result["process_median_s"] = round(statistics.median(r["process_s"] for r in runs), 4)
+    return result
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """기준값 대비 첫 렌더 / import 시간 회귀 목록"""
+    regressions = []
+    for app, r in results.items():
+        base = baseline.get(app)
+        if not base:
+            continue
+        for field in ("first_render_s", "import_s"):
+            if not base.get(field):
+                continue
+            ratio = r[field] / base[field]
+            if ratio > 1 + threshold and r[field] - base[field] > MIN_DELTA_S:
+                regressions.append(f"{app} {field}: {base[field]:.3f}s → {r[field]:.3f}s (x{ratio:.2f})")
+    return regressions
+
+
+def load_json(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_json(path: str, results: Dict[str, dict]):
+    payload = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+
+
+def print_report(app: str, r: dict, top: int):
+    print(f"\n[{app}] 첫 렌더 {r['first_render_s'] * 1000:.0f} ms (그중 import {r['import_s'] * 1000:.0f} ms, "
+          f"모듈 {r['modules_imported']}개) / 프로세스 시작부터 {r['process_median_s'] * 1000:.0f} ms")
+    for name, ms in list(r["packages_ms"].items())[:top]:
+        print(f"  {name:<32} {ms:>9.1f} ms")
+    if r["exceptions"]:
+        print(f"  [경고] 첫 렌더 중 예외 → {r['exceptions'][0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit 진입점 콜드 스타트 / import 시간 프로파일")
+    parser.add_argument("--apps", nargs="+", default=APPS, help="프로파일할 앱 스크립트")
+    parser.add_argument("--repeat", type=int, default=3, help="앱마다 콜드 실행 횟수")
+    parser.add_argument("--top", type=int, default=12, help="출력할 패키지 수")
+    parser.add_argument("--output", default=RESULTS_PATH, help="결과 JSON 경로")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="기준값 JSON 경로")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준값으로 저장")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="회귀로 볼 느려짐 비율")
+    args = parser.parse_args()
+
+    results = {}
+    for app in args.apps:
+        results[app] = profile_app(app, max(1, args.repeat))
+        print_report(app, results[app], args.top)
+    save_json(args.output, results)
+    print(f"\n결과 저장: {args.output}")
+
+    if args.save_baseline:
+        save_json(args.baseline, results)
+        print(f"기준값 저장: {args.baseline}")
+        return
+    baseline = load_json(args.baseline)
+    if baseline is None:
+        print(f"기준값 없음: {args.baseline} (--save-baseline 으로 만들 수 있음)")
+        return
+    regressions = compare(results, baseline["results"], args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+    print(f"회귀 없음 (기준값 대비 {args.threshold:.0%} 이내)")
+
+
+if __name__ == "__main__":
+    main()
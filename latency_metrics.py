@@ -0,0 +1,189 @@
+# latency_metrics.py
+"""
+턴별 단계 지연 시간 + 캐시 적중 카운터 (프로세스 전역, Streamlit 비의존)
+
+- TurnTrace: 한 턴의 단계별 시간(ms)을 세션 ID / 페르소나 / 모델과 함께 기록
+    llm_first_token, first_audio, llm_total, emotion_parse, synthesis, synthesis_cpu, encoding, payload_bytes ...
+- increment(): 캐시 적중/미스, 너굴 gTTS 다운로드 같은 이벤트 카운터
+- 끝난 턴은 JSONL 로그에 한 줄씩 추가 + 최근 METRICS_WINDOW 개로 p50/p95 계산
+- METRICS_PORT 를 지정하면 Prometheus 텍스트 형식의 /metrics 엔드포인트를 띄움
+
+환경변수
+    LATENCY_LOG_PATH=logs/latency.jsonl   (빈 값이면 파일 기록 안 함)
+    METRICS_WINDOW=500                    백분위 계산에 쓰는 최근 턴 수
+    METRICS_PORT=9108                     (기본: 끔)
+
+※ 프로세스 풀(SYNTH_EXECUTOR=process) 워커 안에서 센 카운터는 그 워커 프로세스에만 남음
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Optional
+
+BASE_DIR = os.path.dirname(__file__)
+LATENCY_LOG_PATH = os.getenv("LATENCY_LOG_PATH", os.path.join(BASE_DIR, "logs", "latency.jsonl"))
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "500"))
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+_lock = threading.Lock()
+_log_lock = threading.Lock()
+_counters: Dict[str, int] = defaultdict(int)
+_stages: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=METRICS_WINDOW))
+_turns = 0
+
+
+def increment(name: str, amount: int = 1):
+    """이벤트 카운터 증가 (예: audio_cache_hit, nook_gtts_fetch)"""
+    with _lock:
+        _counters[name] += amount
+
+
+def counters() -> Dict[str, int]:
+    with _lock:
+        return dict(_counters)
+
+
+def percentile(values, q: float) -> float:
+    """최근접 순위 백분위 (values 는 비어 있지 않아야 함)"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def stage_percentiles() -> Dict[str, Dict[str, float]]:
+    """단계별 {count, p50, p95} (최근 METRICS_WINDOW 턴 기준)"""
+    with _lock:
+        snapshot = {stage: list(values) for stage, values in _stages.items() if values}
+    return {
+        stage: {"count": len(values), "p50": percentile(values, 50), "p95": percentile(values, 95)}
+        for stage, values in sorted(snapshot.items())
+    }
+
+
+class TurnTrace:
+    """
+    ➡ 한 턴의 단계별 소요 시간 기록
+       with trace.stage("encoding"): ...     # 구간 측정
+       trace.mark("llm_first_token")         # 턴 시작부터 지금까지
+       trace.add("synthesis_cpu", seconds)   # 이미 잰 시간
+       trace.finish()                        # 집계 + JSONL 기록
+    """
+
+    def __init__(self, session_id: str, persona: str, model: str):
+        self.session_id = session_id
+        self.persona = persona
+        self.model = model
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}   # ms
+        self.values: Dict[str, object] = {}  # payload_bytes, clip_cache 등 시간 외 값
+        self._finished = False
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds * 1000
+
+    def mark(self, name: str):
+        if name not in self.stages:
+            self.stages[name] = (time.perf_counter() - self.started) * 1000
+
+    def set(self, name: str, value):
+        self.values[name] = value
+
+    def finish(self):
+        global _turns
+        if self._finished:
+            return
+        self._finished = True
+        self.mark("turn_total")
+        with _lock:
+            _turns += 1
+            for name, ms in self.stages.items():
+                _stages[name].append(ms)
+        _append_log({
+            "ts": time.time(),
+            "session_id": self.session_id,
+            "persona": self.persona,
+            "model": self.model,
+            "stages_ms": {name: round(ms, 2) for name, ms in self.stages.items()},
+            **self.values,
+        })
+
+
+def _append_log(record: dict):
+    if not LATENCY_LOG_PATH:
+        return
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    try:
+        os.makedirs(os.path.dirname(LATENCY_LOG_PATH), exist_ok=True)
+        with _log_lock, open(LATENCY_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(line)
+    except OSError as e:
+        print(f"[경고] 지연 시간 로그 기록 실패 → {e}")
+
+
+def render_prometheus() -> str:
+    """Prometheus 텍스트 형식 (counter + summary)"""
+    lines = [
+        "# TYPE voicechat_turns_total counter",
+        f"voicechat_turns_total {_turns}",
+        "# TYPE voicechat_events_total counter",
+    ]
+    for name, value in sorted(counters().items()):
+        lines.append(f'voicechat_events_total{{event="{name}"}} {value}')
+    lines.append("# TYPE voicechat_stage_ms summary")
+    for stage, stats in stage_percentiles().items():
+        lines.append(f'voicechat_stage_ms{{stage="{stage}",quantile="0.5"}} {stats["p50"]:.3f}')
+        lines.append(f'voicechat_stage_ms{{stage="{stage}",quantile="0.95"}} {stats["p95"]:.3f}')
+        lines.append(f'voicechat_stage_ms_count{{stage="{stage}"}} {stats["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # 스크레이프마다 stderr 에 찍지 않음
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_started = False
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = METRICS_PORT) -> Optional[ThreadingHTTPServer]:
+    """/metrics 엔드포인트를 백그라운드 스레드로 한 번만 띄움 (port 0 이면 끔)"""
+    global _server, _server_started
+    if not port:
+        return None
+    if not _server_started:
+        with _server_lock:
+            if not _server_started:
+                _server_started = True  # 실패해도 rerun 마다 다시 시도하지 않음
+                try:
+                    _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+                except OSError as e:
+                    print(f"[경고] 메트릭 서버 시작 실패 (port {port}) → {e}")
+                    return None
+                threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
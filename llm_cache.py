@@ -0,0 +1,173 @@
+# llm_cache.py
+"""
+LLM 응답 캐시 (정확히 같은 요청만 적중, 기본은 꺼져 있음)
+
+- key: (시스템 프롬프트, 모델, temperature, 실제로 보내는 히스토리, 사용자 입력) 의 sha256
+    히스토리는 체인과 같은 ContextWindow 를 거친 목록 (last_n / tokens / summary 정책 결과)
+- SQLite 에 저장하며 TTL / 최대 개수 제한
+- LLM_CACHE_DETERMINISTIC_ONLY=1 (기본) 이면 temperature 0 일 때만 캐시 사용
+
+환경변수
+    LLM_CACHE_ENABLED=1               캐시 켜기
+    LLM_CACHE_PATH=cache/llm.sqlite3
+    LLM_CACHE_TTL=86400               초
+    LLM_CACHE_MAX_ENTRIES=5000
+    LLM_CACHE_DETERMINISTIC_ONLY=1
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+from chat_context import get_context_window
+from latency_metrics import increment
+
+BASE_DIR = os.path.dirname(__file__)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "0") == "1"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(BASE_DIR, "cache", "llm.sqlite3"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_DETERMINISTIC_ONLY = os.getenv("LLM_CACHE_DETERMINISTIC_ONLY", "1") == "1"
+
+
+def llm_cache_key(system_prompt, model_name, temperature, context_messages, user_input) -> str:
+    """요청을 정규화한 JSON 의 sha256 (context_messages: 프롬프트에 들어가는 히스토리 그대로)"""
+    payload = json.dumps(
+        {
+            "system": system_prompt.strip(),
+            "model": model_name,
+            "temperature": round(float(temperature), 3),
+            "history": [[m.type, m.content] for m in context_messages],
+            "input": user_input,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite 기반 응답 저장소 (여러 프로세스가 같은 파일을 써도 됨)"""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: float = LLM_CACHE_TTL,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, response TEXT NOT NULL,"
+                " created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite 연결은 스레드별로 하나씩
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+
+class CachedChatbot:
+    """
+    ➡ RunnableWithMessageHistory 체인 앞에 붙는 캐시
+       - 적중하면 LLM 호출 없이 저장된 답변을 한 번에 내보내고 히스토리에도 기록
+       - 미스면 원래 체인을 스트리밍하면서 끝난 뒤 저장
+       - key 의 히스토리는 체인과 같은 context_window 로 자른 / 요약한 목록
+    """
+
+    def __init__(self, chain, get_session_history: Callable, system_prompt: str,
+                 model_name: str, temperature: float, cache: LLMResponseCache,
+                 context_window: Optional[Callable] = None):
+        self.chain = chain
+        self.get_session_history = get_session_history
+        self.system_prompt = system_prompt
+        self.model_name = model_name
+        self.temperature = temperature
+        self.cache = cache
+        self.context_window = context_window or get_context_window()
+
+    def stream(self, inputs: dict, config: dict) -> Iterator[str]:
+        session_id = config.get("configurable", {}).get("session_id", "default")
+        history = self.get_session_history(session_id)
+        user_input = inputs["input"]
+        context = self.context_window({"history": list(history.messages)}, config)["history"]
+        key = llm_cache_key(self.system_prompt, self.model_name, self.temperature, context, user_input)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            increment("llm_cache_hit")
+            history.add_user_message(user_input)
+            history.add_ai_message(cached)
+            yield cached
+            return
+
+        increment("llm_cache_miss")
+        chunks = []
+        for chunk in self.chain.stream(inputs, config=config):
+            chunks.append(chunk)
+            yield chunk
+        self.cache.put(key, "".join(chunks))
+
+    def invoke(self, inputs: dict, config: dict) -> str:
+        return "".join(self.stream(inputs, config))
+
+
+_CACHE: Optional[LLMResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = LLMResponseCache()
+    return _CACHE
+
+
+def with_response_cache(chain, get_session_history, system_prompt, model_name, temperature, context_window=None):
+    """설정에 따라 캐시를 씌운 체인 (꺼져 있으면 원래 체인 그대로, context_window 는 체인에 쓴 것과 같아야 함)"""
+    if not LLM_CACHE_ENABLED:
+        return chain
+    if LLM_CACHE_DETERMINISTIC_ONLY and temperature != 0:
+        return chain
+    return CachedChatbot(chain, get_session_history, system_prompt, model_name, temperature, get_llm_cache(),
+                         context_window)
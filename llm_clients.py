@@ -0,0 +1,163 @@
+# llm_clients.py
+"""
+프로세스 전역 OpenAI 클라이언트 모음
+
+- HTTP 연결 풀(keep-alive)을 하나만 만들어 모든 ChatOpenAI 가 공유 → 매 rerun 마다 TLS 핸드셰이크 없음
+- ChatOpenAI 는 (모델, temperature) 별로 한 번만 생성
+- AsyncOpenAI 와 이를 돌리는 이벤트 루프도 프로세스당 하나 (매 요청 asyncio.run 없음)
+- OPENAI_BASE_URL 을 지정하면 모든 클라이언트가 그 주소로 요청 (예: mock_openai.py 로컬 서버)
+- httpx / openai / langchain_openai 는 클라이언트를 처음 만들 때 import
+    (import 만 2초 가까이 걸려서, 첫 화면 렌더나 대화가 없는 세션은 부담하지 않도록)
+- preload_llm_modules(): 첫 화면을 그린 뒤 백그라운드 스레드에서 미리 import
+    → 사용자가 첫 메시지를 입력하는 동안 끝나 있으므로 첫 답변도 기다리지 않음 (LLM_PRELOAD=0 이면 끔)
+"""
+import asyncio
+import importlib
+import os
+import queue
+import threading
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+if TYPE_CHECKING:
+    import httpx
+    from langchain_openai import ChatOpenAI
+    from openai import AsyncOpenAI
+
+OPENAI_HTTP_MAX_CONNECTIONS = int(os.getenv("OPENAI_HTTP_MAX_CONNECTIONS", "100"))
+OPENAI_HTTP_KEEPALIVE = int(os.getenv("OPENAI_HTTP_KEEPALIVE", "20"))
+OPENAI_HTTP_TIMEOUT = float(os.getenv("OPENAI_HTTP_TIMEOUT", "60"))
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # 없으면 공식 API
+LLM_PRELOAD = os.getenv("LLM_PRELOAD", "1") == "1"
+
+# 첫 메시지에서 필요한 무거운 모듈 (preload_llm_modules 가 미리 올림)
+PRELOAD_MODULES = (
+    "httpx",
+    "openai",
+    "langchain_openai",
+    "langchain_core.prompts",
+    "langchain_core.runnables.history",
+    "langchain_core.output_parsers",
+)
+
+_lock = threading.RLock()
+_http_client: Optional["httpx.Client"] = None
+_chat_llms: Dict[Tuple[str, float], "ChatOpenAI"] = {}
+_async_openai: Optional["AsyncOpenAI"] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_preload_started = False
+
+
+def _limits() -> "httpx.Limits":
+    import httpx
+    return httpx.Limits(
+        max_connections=OPENAI_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_HTTP_KEEPALIVE,
+    )
+
+
+def get_http_client() -> "httpx.Client":
+    """동기 요청용 공유 연결 풀"""
+    global _http_client
+    if _http_client is None:
+        with _lock:
+            if _http_client is None:
+                import httpx
+                _http_client = httpx.Client(limits=_limits(), timeout=OPENAI_HTTP_TIMEOUT)
+    return _http_client
+
+
+def get_chat_llm(model_name: str, temperature: float) -> "ChatOpenAI":
+    """(모델, temperature) 별 ChatOpenAI (공유 연결 풀 사용)"""
+    key = (model_name, float(temperature))
+    llm = _chat_llms.get(key)
+    if llm is None:
+        with _lock:
+            llm = _chat_llms.get(key)
+            if llm is None:
+                from langchain_openai import ChatOpenAI
+                llm = ChatOpenAI(
+                    openai_api_key=os.getenv("OPENAI_API_KEY"),
+                    openai_api_base=OPENAI_BASE_URL,
+                    model=model_name,
+                    temperature=temperature,
+                    http_client=get_http_client(),
+                )
+                _chat_llms[key] = llm
+    return llm
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """백그라운드 스레드에서 계속 도는 공유 이벤트 루프"""
+    global _loop
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="openai-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def run_async(coro):
+    """공유 루프에서 코루틴을 실행하고 결과를 기다림 (스크립트 스레드에서 호출)"""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+
+def iter_async(agen: AsyncIterator) -> Iterator:
+    """공유 루프에서 async generator 를 돌리며 나오는 대로 하나씩 받음 (동기 for 문용)"""
+    items: "queue.Queue" = queue.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for item in agen:
+                items.put((True, item))
+        except BaseException as e:
+            items.put((False, e))
+        finally:
+            items.put((True, done))
+
+    asyncio.run_coroutine_threadsafe(pump(), get_event_loop())
+    while True:
+        ok, item = items.get()
+        if not ok:
+            raise item
+        if item is done:
+            return
+        yield item
+
+
+def get_async_openai() -> "AsyncOpenAI":
+    """공유 루프 전용 AsyncOpenAI (비동기 연결 풀 포함)"""
+    global _async_openai
+    if _async_openai is None:
+        with _lock:
+            if _async_openai is None:
+                import httpx
+                from openai import AsyncOpenAI
+                _async_openai = AsyncOpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    base_url=OPENAI_BASE_URL,
+                    http_client=httpx.AsyncClient(limits=_limits(), timeout=OPENAI_HTTP_TIMEOUT),
+                )
+    return _async_openai
+
+
+def _preload():
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:  # 실제로 쓸 때 같은 오류가 다시 나므로 여기서는 알리기만
+            print(f"[경고] 모듈 미리 불러오기 실패: {name} → {e}")
+
+
+def preload_llm_modules():
+    """PRELOAD_MODULES 를 백그라운드 스레드에서 한 번만 import (첫 렌더 뒤 호출)"""
+    global _preload_started
+    if not LLM_PRELOAD or _preload_started:
+        return
+    with _lock:
+        if _preload_started:
+            return
+        _preload_started = True
+    threading.Thread(target=_preload, name="llm-preload", daemon=True).start()
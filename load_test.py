@@ -0,0 +1,162 @@
+# load_test.py
+"""
+동시 세션 부하 테스트 (mock_openai.py 로컬 서버 사용, 실제 API 호출 없음)
+
+    python load_test.py --sessions 8 --turns 3
+    python load_test.py --app pages/1_voice_chat.py --sessions 16 --ttft-ms 500 --error-rate 0.05
+    python load_test.py --app main.py --voice 너굴 --output load_result.json
+
+- streamlit.testing.v1.AppTest 로 세션 N 개를 동시에 실행
+    AppTest 는 실행할 때마다 전역 Runtime 을 바꿔 끼우므로 한 프로세스에서 동시에 돌릴 수 없음
+    → 세션마다 별도 프로세스 (실제 서버와 달리 st.cache_resource / 연결 풀은 세션끼리 공유 안 됨)
+- 세션마다 chat_input 으로 turns 번 대화하고 턴별 응답 시간을 잼
+- 보고: 처리량(턴/초), 턴 지연 p50/p95/p99, 오류 수,
+        세션당 메모리 (첫 화면 렌더 후 → 대화 끝난 뒤 RSS 증가분, import / 첫 렌더 비용 제외)
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from streamlit.testing.v1 import AppTest
+
+from latency_metrics import percentile
+from mock_openai import add_config_arguments, config_from_args, start_mock_server
+
+APPS = ["main.py", "pages/1_voice_chat.py"]
+PROMPTS = [
+    "안녕! 오늘 기분 어때?",
+    "섬에 새로 온 주민이 있대.",
+    "대출금은 언제까지 갚아야 해?",
+    "오늘 저녁 메뉴 추천해줘.",
+    "재밌는 이야기 하나 해줘.",
+]
+TIMEOUT = 120  # 턴 하나의 최대 실행 시간 (초)
+
+
+class SessionResult(NamedTuple):
+    latencies: List[float]  # 턴별 초
+    errors: int
+    failure: Optional[str]  # 세션이 중간에 멈춘 경우 이유
+    started: float          # 첫 턴 시작 시각 (time.time)
+    finished: float         # 마지막 턴 끝난 시각
+    rss_base: int           # 첫 화면 렌더 후 RSS (bytes)
+    rss_growth: int         # 대화하는 동안 늘어난 RSS (bytes)
+
+
+def rss_bytes() -> int:
+    """현재 프로세스 RSS (Linux 는 /proc, 그 외는 최대 RSS)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+def run_session(app_path: str, turns: int, index: int, voice: Optional[str]) -> SessionResult:
+    """세션 하나: 첫 화면 렌더 후 turns 번 대화"""
+    latencies = []
+    errors = 0
+    started = time.time()
+    rss_base = rss_bytes()
+    try:
+        at = AppTest.from_file(app_path, default_timeout=TIMEOUT)
+        at.run()
+        if voice and at.sidebar.radio and voice in at.sidebar.radio[0].options:
+            at.sidebar.radio[0].set_value(voice).run()
+        rss_base = rss_bytes()
+        started = time.time()
+        for turn in range(turns):
+            prompt = PROMPTS[(index + turn) % len(PROMPTS)]
+            start = time.perf_counter()
+            at.chat_input[0].set_value(prompt).run()
+            latencies.append(time.perf_counter() - start)
+            errors += len(at.error) + len(at.exception)
+    except Exception as e:
+        failure = f"{type(e).__name__}: {e}"
+        return SessionResult(latencies, errors + 1, failure, started, time.time(), rss_base, rss_bytes() - rss_base)
+    return SessionResult(latencies, errors, None, started, time.time(), rss_base, rss_bytes() - rss_base)
+
+
+def run_load_test(app_path: str, sessions: int, turns: int, voice: Optional[str]) -> dict:
+    # 세션마다 새 프로세스 (spawn: 부모의 스레드 / 서버 소켓을 물려받지 않음)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=sessions, mp_context=context) as pool:
+        futures = [pool.submit(run_session, app_path, turns, i, voice) for i in range(sessions)]
+        results = [f.result() for f in futures]
+    # 프로세스 기동 / import 시간은 빼고, 첫 턴 시작부터 마지막 턴 끝까지
+    wall = max(r.finished for r in results) - min(r.started for r in results)
+
+    latencies = [t for r in results for t in r.latencies]
+    failures = [r.failure for r in results if r.failure]
+    report = {
+        "app": app_path,
+        "sessions": sessions,
+        "turns": len(latencies),
+        "errors": sum(r.errors for r in results),
+        "failed_sessions": len(failures),
+        "wall_s": round(wall, 3),
+        "throughput_turns_per_s": round(len(latencies) / wall, 3) if wall > 0 else None,
+        "rss_mb_base": round(sum(r.rss_base for r in results) / sessions / 2**20, 1),
+        "rss_mb_per_session": round(sum(r.rss_growth for r in results) / sessions / 2**20, 2),
+    }
+    if latencies:
+        for q in (50, 95, 99):
+            report[f"latency_p{q}_ms"] = round(percentile(latencies, q) * 1000, 1)
+    if failures:
+        report["first_failure"] = failures[0]
+    return report
+
+
+def print_report(report: dict):
+    print(f"\n[{report['app']}] 세션 {report['sessions']}개, 턴 {report['turns']}개, 오류 {report['errors']}건")
+    print(f"  처리량      {report['throughput_turns_per_s']} 턴/초  (총 {report['wall_s']}초)")
+    if "latency_p50_ms" in report:
+        print(f"  턴 지연     p50 {report['latency_p50_ms']} ms / p95 {report['latency_p95_ms']} ms / p99 {report['latency_p99_ms']} ms")
+    print(f"  메모리      첫 렌더 후 RSS {report['rss_mb_base']} MB, 대화 중 세션당 +{report['rss_mb_per_session']} MB")
+    if "first_failure" in report:
+        print(f"  [경고] 실패한 세션 {report['failed_sessions']}개 → {report['first_failure']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="동시 세션 부하 테스트 (로컬 mock OpenAI)")
+    parser.add_argument("--app", nargs="+", choices=APPS, default=APPS, help="테스트할 앱 스크립트")
+    parser.add_argument("--sessions", type=int, default=4, help="동시 세션 수")
+    parser.add_argument("--turns", type=int, default=3, help="세션당 대화 턴 수")
+    parser.add_argument("--voice", default="r2-d2",
+                        help="사이드바 음성 스타일 (앱에 있는 값일 때만 적용, 기본 r2-d2 는 네트워크 미사용)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    # 앱이 import 되기 전에 모든 OpenAI 클라이언트를 로컬 서버로 향하게 함
+    server = start_mock_server(config_from_args(args))
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ["OPENAI_API_KEY"] = "mock"
+    os.environ.setdefault("NOOK_ALLOW_GTTS", "0")
+    print(f"mock OpenAI: {server.base_url}  ({server.config})")
+
+    os.chdir(BASE_DIR)
+    reports = [run_load_test(app, args.sessions, args.turns, args.voice) for app in args.app]
+    for report in reports:
+        print_report(report)
+    server.shutdown()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
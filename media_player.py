@@ -0,0 +1,93 @@
+# media_player.py
+import hashlib
+from typing import Optional
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+
+def audio_digest(data: bytes) -> str:
+    """클립 내용 해시 (파일명 / 중복 판별용)"""
+    return hashlib.sha256(data).hexdigest()
+
+
+# 부모 문서의 공용 재생 대기열 (조각 / 전체 클립 플레이어가 함께 씀)
+#   fresh(): 이 스크립트의 iframe 보다 앞에 그려진 <audio> 중 처음 보는 것 (요소, src 기준)
+#            → 나중에 그려진 전체 클립 플레이어나 다음 턴의 플레이어를 대기열에 넣지 않음
+_PLAYER_JS = """
+const w = window.parent;
+const p = w.__segmentPlayer || (w.__segmentPlayer = {
+    seen: new WeakMap(), queue: [], current: null,
+});
+const frame = window.frameElement;
+const fresh = () => Array.from(w.document.querySelectorAll("audio")).filter((el) => {
+    if (frame && !(el.compareDocumentPosition(frame) & Node.DOCUMENT_POSITION_FOLLOWING)) return false;
+    if (p.seen.get(el) === el.src) return false;
+    p.seen.set(el, el.src);
+    return true;
+});
+const playNext = () => {
+    p.current = p.queue.shift() || null;
+    if (!p.current) return;
+    p.current.addEventListener("ended", playNext, { once: true });
+    p.current.play().catch(playNext);
+};
+"""
+
+
+def _player_script(digest: str, body: str):
+    # 주석의 해시 덕분에 턴마다 새 iframe 으로 인식되어 스크립트가 다시 실행됨
+    components.html(f"<!-- {digest} -->\n<script>{_PLAYER_JS}{body}</script>", height=0)
+
+
+def render_audio(
+    data: bytes,
+    mime: str,
+    extension: Optional[str] = None,
+    download_prefix: Optional[str] = None,
+    autoplay: bool = True,
+):
+    """
+    ➡ 클립을 한 번만 전달해서 재생 + 다운로드
+       - st.audio / st.download_button 은 바이트를 Streamlit 미디어 저장소에 넣고 URL 로만 참조
+         (웹소켓 메시지에 base64 로 싣지 않음, 같은 bytes 객체라 서버 메모리에도 한 벌)
+       - 자동 재생은 방금 그린 <audio> 를 재생시키는 작은 스크립트로 처리
+       - 자동 재생하지 않아도 조각 재생 대기열이 이 플레이어를 집어가지 않도록 표시
+    """
+    digest = audio_digest(data)
+    st.audio(data, format=mime)
+    _player_script(
+        digest,
+        """
+        const players = fresh();
+        if (players.length) players[players.length - 1].play().catch(() => {});
+        """ if autoplay else "fresh();",
+    )
+
+    if download_prefix:
+        st.download_button(
+            label="🔊 음성 다운로드",
+            data=data,
+            file_name=f"{download_prefix}_{digest[:12]}.{extension or mime.split('/')[-1]}",
+            mime=mime,
+        )
+
+
+def render_audio_segment(data: bytes, mime: str):
+    """
+    ➡ 스트리밍 중인 음성의 한 조각을 재생 대기열에 추가
+       - 조각마다 st.audio 를 그리고, 부모 문서의 공용 대기열이 앞 조각이 끝나면 다음 조각을 재생
+       - 조각 플레이어는 숨김 (다시 듣기 / 다운로드는 끝난 뒤 render_audio 로 전체 클립 하나만)
+    """
+    st.audio(data, format=mime)
+    _player_script(
+        audio_digest(data),
+        """
+        fresh().forEach((el) => {
+            (el.closest('[data-testid="element-container"]') || el).style.display = "none";
+            p.queue.push(el);
+        });
+        // 재생 중인 조각이 없거나 rerun 으로 사라졌으면 바로 시작
+        if (!p.current || !p.current.isConnected || p.current.ended) playNext();
+        """,
+    )
@@ -0,0 +1,261 @@
+# mock_openai.py
+"""
+OpenAI API 로컬 대역 서버 (부하 테스트 / 오프라인 개발용, 외부 의존성 없음)
+
+    python mock_openai.py --port 8765 --ttft-ms 300 --tokens-per-s 40 --error-rate 0.02
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=mock streamlit run main.py
+
+- POST /v1/chat/completions   일반 / 스트리밍(SSE) 응답, 첫 토큰 지연(TTFT)과 초당 토큰 수 조절
+- POST /v1/audio/speech       24kHz mono PCM (response_format pcm | wav), 실시간 대비 생성 속도 조절
+- 일정 확률로 오류 응답 (기본 500, --error-status 429 로 rate limit 흉내)
+- 답변은 마지막 사용자 메시지로 고르므로 같은 입력이면 항상 같음
+    (시스템 프롬프트가 [프롬프트] 형식을 요구하면 voice_chat 페이지용 형식으로 답함)
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, NamedTuple, Optional, Tuple
+
+from audio_encoder import pcm_to_wav
+
+MOCK_PORT = int(os.getenv("MOCK_OPENAI_PORT", "8765"))
+TTS_SAMPLE_RATE = 24000
+TTS_MS_PER_CHAR = 90      # 글자당 음성 길이
+TTS_CHUNK_MS = 100        # 오디오 스트리밍 청크 길이
+
+REPLIES = [
+    ("positive", "안녕하세요! 오늘도 만나서 정말 반가워요. 무엇이든 물어보세요."),
+    ("neutral", "음, 그건 조금 생각해봐야겠네요. 천천히 하나씩 살펴볼게요."),
+    ("positive", "좋은 질문이에요! 제가 아는 만큼 쉽게 설명해 드릴게요."),
+    ("negative", "아이고, 그건 좀 곤란하네요. 그래도 방법을 같이 찾아봐요."),
+    ("neutral", "알겠어요. 섬 생활은 느긋하게 즐기는 게 제일이랍니다."),
+]
+
+
+class MockConfig(NamedTuple):
+    ttft_ms: float = float(os.getenv("MOCK_TTFT_MS", "300"))          # 첫 토큰까지 지연
+    tokens_per_s: float = float(os.getenv("MOCK_TOKENS_PER_S", "40"))  # 0 이면 지연 없이 전송
+    tts_speed: float = float(os.getenv("MOCK_TTS_SPEED", "4"))         # 실시간의 몇 배 속도로 음성 생성 (0: 즉시)
+    error_rate: float = float(os.getenv("MOCK_ERROR_RATE", "0"))       # 0 ~ 1
+    error_status: int = int(os.getenv("MOCK_ERROR_STATUS", "500"))
+
+
+def pick_reply(messages: List[dict]) -> str:
+    """마지막 사용자 메시지 해시로 답변 선택 (시스템 프롬프트 형식에 맞춤)"""
+    user_text = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    system_text = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+    index = int(hashlib.sha256(str(user_text).encode("utf-8")).hexdigest(), 16) % len(REPLIES)
+    emotion, text = REPLIES[index]
+    if "[프롬프트]" in str(system_text):
+        return f"[대답] {text}\n---\n[프롬프트] Speak warmly and a little playfully, in a {emotion} mood."
+    return f"({emotion}) {text}"
+
+
+def split_tokens(text: str) -> List[str]:
+    """대략적인 토큰 단위 (두 글자씩)"""
+    return re.findall(r".{1,2}", text, re.DOTALL)
+
+
+def synth_pcm(text: str, voice: str) -> bytes:
+    """글자 수에 비례하는 길이의 조용한 톤 (목소리마다 음높이만 다름)"""
+    frames = max(1, len(text)) * TTS_SAMPLE_RATE * TTS_MS_PER_CHAR // 1000
+    freq = 180 + int(hashlib.md5(voice.encode("utf-8")).hexdigest(), 16) % 200
+    step = 2 * math.pi * freq / TTS_SAMPLE_RATE
+    return struct.pack(f"<{frames}h", *(int(3000 * math.sin(step * i)) for i in range(frames)))
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive (클라이언트 연결 풀 재사용)
+
+    @property
+    def config(self) -> MockConfig:
+        return self.server.config
+
+    # ---------------------------------------------------------------- helpers
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str, error_type: str = "server_error"):
+        self._send_json(status, {"error": {"message": message, "type": error_type, "code": None}})
+
+    def _should_fail(self) -> bool:
+        with self.server.rng_lock:
+            return self.server.rng.random() < self.config.error_rate
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):  # 요청마다 stderr 에 찍지 않음
+        pass
+
+    # ---------------------------------------------------------------- routes
+    def do_POST(self):
+        path = self.path.split("?")[0].rstrip("/")
+        try:
+            request = self._read_json()
+        except ValueError:
+            self._send_error(400, "invalid JSON body", "invalid_request_error")
+            return
+        if path.endswith("/chat/completions"):
+            self._chat_completions(request)
+        elif path.endswith("/audio/speech"):
+            self._audio_speech(request)
+        else:
+            self._send_error(404, f"unknown endpoint: {path}", "invalid_request_error")
+
+    def _chat_completions(self, request: dict):
+        if self._should_fail():
+            self._send_error(self.config.error_status, "mock injected error")
+            return
+        model = request.get("model", "mock")
+        reply = pick_reply(request.get("messages", []))
+        created = int(time.time())
+        usage = {"prompt_tokens": 0, "completion_tokens": len(split_tokens(reply)), "total_tokens": 0}
+        time.sleep(self.config.ttft_ms / 1000)
+
+        if not request.get("stream"):
+            time.sleep(self._token_delay() * max(0, usage["completion_tokens"] - 1))
+            self._send_json(200, {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(delta: dict, finish_reason: Optional[str] = None, **extra) -> bytes:
+            payload = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra,
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+
+        self._write_chunk(event({"role": "assistant", "content": ""}))
+        for i, token in enumerate(split_tokens(reply)):
+            if i:
+                time.sleep(self._token_delay())
+            self._write_chunk(event({"content": token}))
+        self._write_chunk(event({}, "stop"))
+        if (request.get("stream_options") or {}).get("include_usage"):
+            payload = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": created,
+                       "model": model, "choices": [], "usage": usage}
+            self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _token_delay(self) -> float:
+        return 1 / self.config.tokens_per_s if self.config.tokens_per_s > 0 else 0.0
+
+    def _audio_speech(self, request: dict):
+        if self._should_fail():
+            self._send_error(self.config.error_status, "mock injected error")
+            return
+        response_format = request.get("response_format", "mp3")
+        if response_format not in ("pcm", "wav"):
+            self._send_error(400, f"mock server supports pcm/wav only (got {response_format})",
+                             "invalid_request_error")
+            return
+        pcm = synth_pcm(request.get("input", ""), request.get("voice", "alloy"))
+        time.sleep(self.config.ttft_ms / 1000)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/pcm" if response_format == "pcm" else "audio/wav")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if response_format == "wav":
+            self._write_chunk(pcm_to_wav(pcm, TTS_SAMPLE_RATE))
+            self._write_chunk(b"")
+            return
+        chunk_bytes = TTS_SAMPLE_RATE * 2 * TTS_CHUNK_MS // 1000
+        delay = TTS_CHUNK_MS / 1000 / self.config.tts_speed if self.config.tts_speed > 0 else 0.0
+        for start in range(0, len(pcm), chunk_bytes):
+            if start:
+                time.sleep(delay)
+            self._write_chunk(pcm[start:start + chunk_bytes])
+        self._write_chunk(b"")
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: MockConfig, seed: Optional[int] = None):
+        super().__init__(address, MockOpenAIHandler)
+        self.config = config
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_mock_server(config: MockConfig = MockConfig(), host: str = "127.0.0.1", port: int = 0,
+                      seed: Optional[int] = None) -> MockOpenAIServer:
+    """백그라운드 스레드로 서버 시작 (port 0 이면 빈 포트 자동 선택)"""
+    server = MockOpenAIServer((host, port), config, seed)
+    threading.Thread(target=server.serve_forever, name="mock-openai", daemon=True).start()
+    return server
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    defaults = MockConfig()
+    parser.add_argument("--ttft-ms", type=float, default=defaults.ttft_ms, help="첫 토큰 / 첫 오디오까지 지연 (ms)")
+    parser.add_argument("--tokens-per-s", type=float, default=defaults.tokens_per_s, help="초당 토큰 수 (0: 지연 없음)")
+    parser.add_argument("--tts-speed", type=float, default=defaults.tts_speed, help="음성 생성 속도 (실시간 배수, 0: 즉시)")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="오류 응답 확률 (0 ~ 1)")
+    parser.add_argument("--error-status", type=int, default=defaults.error_status, help="오류 응답 HTTP 상태 코드")
+
+
+def config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(args.ttft_ms, args.tokens_per_s, args.tts_speed, args.error_rate, args.error_status)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI API 로컬 대역 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=MOCK_PORT)
+    parser.add_argument("--seed", type=int, default=None, help="오류 주입 난수 시드")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockOpenAIServer((args.host, args.port), config_from_args(args), args.seed)
+    print(f"mock OpenAI: {server.base_url}  ({server.config})")
+    print(f"  OPENAI_BASE_URL={server.base_url} OPENAI_API_KEY=mock streamlit run main.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
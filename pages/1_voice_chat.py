@@ -1,25 +1,18 @@
 import os
 import streamlit as st
-import time
-import asyncio
-import base64
-import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+# (체인 / ChatOpenAI 관련 langchain, openai 는 create_chatbot 에서 import → 첫 화면이 기다리지 않음)
 from langchain_community.chat_message_histories import StreamlitChatMessageHistory
-from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain_openai import ChatOpenAI
-from langchain_core.output_parsers import StrOutputParser
-
-from openai import AsyncOpenAI
 
 from prompts.prompt import VOICE_LLM_PROMPT
-
-# OpenAI API Key
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+from llm_cache import with_response_cache
+from llm_clients import get_async_openai, get_chat_llm, iter_async, preload_llm_modules, run_async
+from audio_encoder import pcm_to_wav
+from chat_context import current_session_id, get_context_window
+from media_player import render_audio, render_audio_segment
 
 st.set_page_config(
     page_title="voice_chat",
@@ -29,16 +22,23 @@ st.title("voice_chat (LLM + OpenAI TTS)")
 
 
 
-# Streamlit용 채팅 히스토리 설정
-@st.cache_resource
+# Streamlit용 채팅 히스토리 설정 (세션마다 자신의 st.session_state 에 저장)
 def get_chat_history():
     return StreamlitChatMessageHistory(key="voice_chat_messages")
 
 def get_session_history(session_id: str):
+    # session_id = 현재 Streamlit 세션 ID (current_session_id), 히스토리는 그 세션 상태에 있음
     return get_chat_history()
 
 
 
+def streaming_answer(partial: str) -> str:
+    """스트리밍 중인 응답에서 화면에 보일 '[대답]' 부분만 (구분선 이후 '[프롬프트]' 는 숨김)"""
+    import re
+    answer = re.sub(r"^\s*\[대답\]\s*", "", partial)
+    return re.split(r"\s*-{3,}", answer, maxsplit=1)[0]
+
+
 def parse_llm_response(response: str):
     """
     LLM의 응답에서 '[대답]' 부분과 '[프롬프트]' 부분을 각각 추출
@@ -61,33 +61,39 @@ def parse_llm_response(response: str):
 
 
 # OpenAI 챗봇 설정 ------------------------------------------------------
+@st.cache_resource(show_spinner=False)  # (모델, temperature) 별로 프로세스당 한 번만 생성
 def create_chatbot(model_name="gpt-3.5-turbo", temperature=0.7):
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+    from langchain_core.runnables import RunnableLambda
+    from langchain_core.runnables.history import RunnableWithMessageHistory
+    from langchain_core.output_parsers import StrOutputParser
+
     prompt = ChatPromptTemplate.from_messages([
         ("system", VOICE_LLM_PROMPT),
         MessagesPlaceholder(variable_name="history"),
         ("human", "{input}")
     ])
-    llm = ChatOpenAI(
-        openai_api_key=OPENAI_API_KEY,
-        model=model_name,
-        temperature=temperature
-    )
-    chain = prompt | llm | StrOutputParser()
+    # ChatOpenAI 모델 (모델/temperature 별로 하나, 연결 풀 공유)
+    llm = get_chat_llm(model_name, temperature)
+    # (히스토리는 CHAT_CONTEXT_POLICY 에 맞게 잘라서 프롬프트에 넣음)
+    chain = RunnableLambda(get_context_window()) | prompt | llm | StrOutputParser()
     with_message_history = RunnableWithMessageHistory(
         chain,
         get_session_history,
         input_messages_key="input",
         history_messages_key="history",
     )
-    return with_message_history
+    return with_response_cache(
+        with_message_history, get_session_history, VOICE_LLM_PROMPT, model_name, temperature
+    )
 
 
-# TTS (OpenAI gpt-4o-mini-tts) : 답변을 음성으로 변환 (wav 임시파일 반환)
-async def generate_tts_wav(text, voice="alloy", instructions=""):
-    client = AsyncOpenAI(api_key=OPENAI_API_KEY)
-    tmp_pcm = tempfile.NamedTemporaryFile(delete=False, suffix=".pcm")
-    tmp_wav = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-    # 1. PCM 스트리밍 생성 및 저장
+# TTS (OpenAI gpt-4o-mini-tts) : 답변을 음성으로 변환
+TTS_SAMPLE_RATE = 24000  # OpenAI PCM은 24kHz, 1ch, 16bit
+
+async def stream_tts_pcm(text, voice="alloy", instructions=""):
+    """OpenAI TTS 의 PCM 청크를 도착하는 대로 내보냄"""
+    client = get_async_openai()
     async with client.audio.speech.with_streaming_response.create(
         model="gpt-4o-mini-tts",
         voice=voice,
@@ -95,19 +101,49 @@ async def generate_tts_wav(text, voice="alloy", instructions=""):
         instructions=instructions,
         response_format="pcm",
     ) as response:
-        with open(tmp_pcm.name, "wb") as f:
-            async for chunk in response.iter_bytes():
-                f.write(chunk)
-    # 2. PCM → WAV 변환 (16kHz, 1ch, 16bit)
-    import wave
-    with open(tmp_pcm.name, "rb") as pcmfile:
-        pcmdata = pcmfile.read()
-    with wave.open(tmp_wav.name, "wb") as wavfile:
-        wavfile.setnchannels(1)
-        wavfile.setsampwidth(2)  # 16bit PCM = 2 bytes
-        wavfile.setframerate(24000)  # OpenAI PCM은 24kHz
-        wavfile.writeframes(pcmdata)
-    return tmp_wav.name
+        async for chunk in response.iter_bytes():
+            yield chunk
+
+async def generate_tts_pcm(text, voice="alloy", instructions=""):
+    """스트리밍되는 PCM 청크를 메모리 버퍼에 모음 (임시 파일 없음)"""
+    pcm = bytearray()
+    async for chunk in stream_tts_pcm(text, voice=voice, instructions=instructions):
+        pcm.extend(chunk)
+    return bytes(pcm)
+
+def generate_tts_wav(text, voice="alloy", instructions=""):
+    """PCM → WAV bytes (공유 클라이언트/이벤트 루프에서 실행)"""
+    pcm = run_async(generate_tts_pcm(text, voice=voice, instructions=instructions))
+    return pcm_to_wav(pcm, TTS_SAMPLE_RATE)
+
+# 스트리밍 재생: 첫 조각은 짧게, 이후 조각은 점점 길게 (조각 수와 이음새를 줄이기 위해)
+SEGMENT_FIRST_SECONDS = 0.25  # 첫 조각 최소 길이 (수십 ms 조각은 짧게 들리고 끊김)
+SEGMENT_MIN_SECONDS = 0.5
+SEGMENT_MAX_SECONDS = 2.0
+PCM_BYTES_PER_SECOND = TTS_SAMPLE_RATE * 2  # 1ch, 16bit
+
+def play_tts_progressively(text, voice="alloy", instructions=""):
+    """
+    TTS 가 스트리밍되는 동안 조각(WAV) 단위로 브라우저에 보내 바로 재생
+        - 조각 플레이어는 숨겨지고, 끝나면 전체 PCM 을 돌려줌 (다시 듣기 / 다운로드용)
+    """
+    pcm = bytearray()
+    sent = 0  # 조각으로 보낸 바이트 수
+    target = int(PCM_BYTES_PER_SECOND * SEGMENT_FIRST_SECONDS)
+    seconds = SEGMENT_MIN_SECONDS
+    for chunk in iter_async(stream_tts_pcm(text, voice=voice, instructions=instructions)):
+        pcm.extend(chunk)
+        if len(pcm) - sent < target:
+            continue
+        cut = len(pcm) - len(pcm) % 2  # 16bit 샘플 경계에서 자름
+        render_audio_segment(pcm_to_wav(bytes(pcm[sent:cut]), TTS_SAMPLE_RATE), "audio/wav")
+        sent = cut
+        target = int(PCM_BYTES_PER_SECOND * seconds)
+        seconds = min(seconds * 2, SEGMENT_MAX_SECONDS)
+    cut = len(pcm) - len(pcm) % 2
+    if cut - sent >= 2:
+        render_audio_segment(pcm_to_wav(bytes(pcm[sent:cut]), TTS_SAMPLE_RATE), "audio/wav")
+    return bytes(pcm[:cut])
 
 # -------------------------------------
 # Streamlit 인터페이스
@@ -134,6 +170,11 @@ with st.sidebar:
         ["alloy", "ash", "ballad", "coral", "echo", "fable", "onyx", "nova", "sage", "shimmer", "verse"],
         index=0
     )
+    progressive_playback = st.checkbox(
+        "스트리밍 재생",
+        value=True,
+        help="음성이 생성되는 대로 조각 단위로 바로 재생합니다"
+    )
     
     # 대화 초기화 버튼
     if st.button("🗑️ 대화 초기화"):
@@ -161,12 +202,6 @@ for message in msgs.messages:
     with st.chat_message(message.type):
         st.markdown(message.content)
 
-chatbot = create_chatbot(
-    model_name=model_name, 
-    temperature=temperature
-    )
-
-
 # ------------------------------------------------------------------------------------------
 
 
@@ -177,6 +212,12 @@ if user_input := st.chat_input("메시지를 입력하세요..."):
     if not os.getenv("OPENAI_API_KEY"):
         st.error("OPENAI_API_KEY가 .env 파일에 설정되지 않았습니다.")
         st.stop()
+
+    # 챗봇 설정 (첫 메시지에서 생성 → 이후는 캐시, 첫 화면 렌더는 LLM 클라이언트 import 를 기다리지 않음)
+    chatbot = create_chatbot(
+        model_name=model_name, 
+        temperature=temperature
+        )
     
     # 사용자 메시지 표시
     with st.chat_message("user"):
@@ -185,21 +226,17 @@ if user_input := st.chat_input("메시지를 입력하세요..."):
     with st.chat_message("assistant"):
         message_placeholder = st.empty()
         try:
-            # 1. LLM 답변 생성
-            response = chatbot.invoke(
+            # 1. LLM 답변 스트리밍 (토큰이 도착하는 대로 '[대답]' 부분만 표시)
+            response = ""
+            for chunk in chatbot.stream(
                 {"input": user_input},
-                config={"configurable": {"session_id": "default"}}
-            )
+                config={"configurable": {"session_id": current_session_id()}}
+            ):
+                response += chunk
+                message_placeholder.markdown(streaming_answer(response) + "▌")
             
             # 2. 응답 파싱: answer, voice_prompt로 분리
             answer, voice_prompt = parse_llm_response(response)
-            
-            # 타이핑 효과
-            displayed_response = ""
-            for word in answer.split():
-                displayed_response += word + " "
-                time.sleep(0.05)
-                message_placeholder.markdown(displayed_response + "▌")
             # 최종 답변
             message_placeholder.markdown(answer)
 
@@ -207,22 +244,23 @@ if user_input := st.chat_input("메시지를 입력하세요..."):
             st.info("AI 답변을 음성으로 듣는 중...")
             if not voice_prompt:
                 voice_prompt = "You are a kind AI love partner." # Fallback prompt
-            wav_path = asyncio.run(generate_tts_wav(answer, voice=voice_style, instructions=voice_prompt))
-            audio_file = open(wav_path, 'rb')
-            audio_bytes = audio_file.read()
-            st.audio(audio_bytes, format="audio/wav")
-            audio_file.close()
-            os.remove(wav_path)
-            
-            # base64 인코딩
-            audio_base64 = base64.b64encode(audio_bytes).decode()
-            audio_html = f"""
-            <audio autoplay>
-                <source src="data:audio/wav;base64,{audio_base64}" type="audio/wav">
-                브라우저가 audio 태그를 지원하지 않습니다.
-            </audio>
-            """
-            st.markdown(audio_html, unsafe_allow_html=True)
+            if progressive_playback:
+                # 생성되는 대로 조각 단위로 재생 (첫 조각은 SEGMENT_FIRST_SECONDS 만큼 모이면 바로)
+                pcm = play_tts_progressively(answer, voice=voice_style, instructions=voice_prompt)
+                if pcm:
+                    # 숨겨진 조각 플레이어 대신 전체 클립 하나 (다시 듣기 / 다운로드, 자동 재생 안 함)
+                    render_audio(
+                        pcm_to_wav(pcm, TTS_SAMPLE_RATE),
+                        "audio/wav",
+                        extension="wav",
+                        download_prefix=f"{voice_style}_voice",
+                        autoplay=False,
+                    )
+            else:
+                audio_bytes = generate_tts_wav(answer, voice=voice_style, instructions=voice_prompt)
+
+                # 한 번만 전달 (st.audio 미디어 URL 로 재생, base64 인라인 중복 없음)
+                render_audio(audio_bytes, "audio/wav")
             
         except Exception as e:
             st.error(f"오류: {e}")
@@ -241,3 +279,6 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+
+# 첫 화면을 다 그린 뒤 첫 메시지에 필요한 LLM 모듈을 백그라운드에서 미리 import (프로세스당 한 번)
+preload_llm_modules()
@@ -0,0 +1,203 @@
+# render_corpus.py
+"""
+대사 목록(JSONL / CSV)을 음성 파일로 한꺼번에 렌더링 (키오스크 / 로봇 펌웨어용)
+
+    python render_corpus.py lines.jsonl --output-dir renders/
+    python render_corpus.py lines.csv --output-dir renders/ --format mp3 --workers 8
+
+입력 행: text (필수), voice_style, emotion, seed, random_factor (선택)
+    {"text": "어서 오세요!", "voice_style": "너굴", "emotion": "positive", "seed": 7}
+
+- 행을 청크로 묶어 프로세스 풀에 분산 (워커마다 사운드 뱅크는 시작할 때 한 번만 로드)
+- 워커가 파일을 직접 쓰고 결과만 돌려줌 (오디오 바이트를 부모로 보내지 않음)
+- output-dir/manifest.jsonl 에 끝난 행을 한 줄씩 기록
+- 다시 실행하면 manifest 에 있고 파일도 남아 있는 행은 건너뜀 (중단 후 이어서 실행)
+- 파일 이름은 행 내용(텍스트, 스타일, 감정, 시드, 변조 강도, 포맷)의 해시 → 순서가 바뀌어도 재사용
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Dict, Iterator, List, Optional
+
+from audio_cache import audio_cache_key
+from audio_encoder import ENCODERS
+from synthesis_executor import SYNTH_WORKERS, create_executor
+from voice_engines import VOICE_STYLES, synthesize_voice, voice_engine_version, warm_up
+
+MANIFEST_NAME = "manifest.jsonl"
+CHUNK_SIZE = 16         # 워커 호출 한 번에 보내는 행 수
+IN_FLIGHT_PER_WORKER = 4  # 워커당 동시에 걸어둘 청크 수 (메모리 상한)
+
+
+def read_rows(path: str) -> Iterator[dict]:
+    """JSONL 또는 CSV (확장자로 판단) 를 dict 로 한 행씩"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith(".csv"):
+            yield from csv.DictReader(f)
+            return
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                print(f"[경고] {path}:{line_no} JSON 파싱 실패 → {e}")
+
+
+def normalize_row(row: dict, defaults: argparse.Namespace) -> Optional[dict]:
+    """잘못된 행(텍스트 없음, 숫자가 아닌 seed / random_factor)은 None"""
+    text = str(row.get("text") or "").strip()
+    if not text:
+        return None
+    seed = row.get("seed")
+    try:
+        seed = int(seed) if seed not in (None, "") else None
+        random_factor = float(row.get("random_factor") or defaults.random_factor)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(random_factor):
+        return None
+    return {
+        "text": text,
+        "voice_style": row.get("voice_style") or defaults.voice_style,
+        "emotion": row.get("emotion") or "neutral",
+        "seed": seed,
+        "random_factor": random_factor,
+        "format": defaults.format,
+    }
+
+
+def row_key(row: dict) -> str:
+    # 엔진 / 뱅크가 바뀌면 이어서 렌더링할 때 예전 결과를 건너뛰지 않도록 버전도 포함
+    return audio_cache_key(
+        row["voice_style"], row["text"], row["emotion"], row["random_factor"], row["seed"], row["format"],
+        engine=voice_engine_version(row["voice_style"]),
+    )
+
+
+def load_manifest(output_dir: str) -> Dict[str, dict]:
+    """이미 렌더링된 행 (key → manifest 항목, 파일이 남아 있는 것만)"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # 중단되며 반쯤 써진 줄
+            if os.path.exists(os.path.join(output_dir, entry["file"])):
+                done[entry["key"]] = entry
+    return done
+
+
+def render_rows(rows: List[dict], output_dir: str) -> List[dict]:
+    """워커에서 실행: 행마다 합성 → 파일 저장, manifest 항목 반환 (실패는 error 포함)"""
+    entries = []
+    for row in rows:
+        key = row_key(row)
+        file_name = f"{key[:20]}.{row['format']}"
+        entry = {"key": key, "file": file_name, **row}
+        start = time.perf_counter()
+        try:
+            audio_seg = synthesize_voice(
+                row["text"], row["voice_style"], row["emotion"], row["random_factor"], seed=row["seed"]
+            )
+            if audio_seg is None:
+                raise ValueError("합성 결과가 비어 있음")
+            data = ENCODERS[row["format"]](audio_seg)
+            path = os.path.join(output_dir, file_name)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)  # 중단돼도 반쯤 쓴 파일이 남지 않도록
+            entry.update(bytes=len(data), duration_s=round(audio_seg.duration_seconds, 3))
+        except Exception as e:
+            entry["error"] = f"{type(e).__name__}: {e}"
+        entry["render_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        entries.append(entry)
+    return entries
+
+
+def chunked(items: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대사 목록을 음성 파일로 일괄 렌더링")
+    parser.add_argument("input", help="JSONL 또는 CSV (text, voice_style, emotion, seed)")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--format", choices=list(ENCODERS), default="wav")
+    parser.add_argument("--voice-style", choices=VOICE_STYLES, default="너굴", help="행에 voice_style 이 없을 때")
+    parser.add_argument("--random-factor", type=float, default=0.35, help="행에 random_factor 가 없을 때")
+    parser.add_argument("--workers", type=int, default=SYNTH_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    done = load_manifest(args.output_dir)
+
+    pending = {}
+    skipped = invalid = 0
+    for raw in read_rows(args.input):
+        row = normalize_row(raw, args)
+        if row is None or row["voice_style"] not in VOICE_STYLES:
+            invalid += 1
+            continue
+        key = row_key(row)
+        if key in done:
+            skipped += 1
+        else:
+            pending.setdefault(key, row)  # 같은 행이 여러 번 있으면 한 번만
+    print(f"렌더링 {len(pending)}행 (이미 완료 {skipped}행, 잘못된 행 {invalid}행), 워커 {args.workers}개")
+    if not pending:
+        return
+
+    rendered = failed = 0
+    start = time.perf_counter()
+    chunks = chunked(iter(pending.values()), args.chunk_size)
+    manifest_path = os.path.join(args.output_dir, MANIFEST_NAME)
+    with create_executor("process", args.workers, initializer=warm_up) as pool, \
+            open(manifest_path, "a", encoding="utf-8") as manifest:
+        in_flight = set()
+        limit = args.workers * IN_FLIGHT_PER_WORKER
+        while True:
+            for chunk in chunks:
+                in_flight.add(pool.submit(render_rows, chunk, args.output_dir))
+                if len(in_flight) >= limit:
+                    break
+            if not in_flight:
+                break
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                for entry in future.result():
+                    if "error" in entry:
+                        failed += 1
+                        print(f"[경고] 렌더링 실패: {entry['text'][:30]} → {entry['error']}")
+                        continue
+                    rendered += 1
+                    manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            manifest.flush()
+            elapsed = time.perf_counter() - start
+            print(f"  {rendered + failed}/{len(pending)}  ({rendered / elapsed:.1f}행/초)", end="\r")
+
+    elapsed = time.perf_counter() - start
+    print(f"\n완료: {rendered}행 저장, 실패 {failed}행, {elapsed:.1f}초 ({rendered / elapsed:.1f}행/초)")
+    print(f"manifest: {manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# sound_bank.py
+"""
+세 음성 엔진(너굴 / r2-d2 / edie)이 함께 쓰는 packed 사운드 뱅크
+
+    sound_bank.pcm   : 모든 음원을 이어 붙인 int16 PCM 한 덩어리
+    sound_bank.json  : {key: [offset, length, rate, channels]} (offset/length 는 int16 샘플 단위)
+
+- mmap 으로 열기 때문에 여러 Streamlit 워커 프로세스가 같은 page cache 를 공유함
+- key 규칙: "nook/가", "r2d2/ㄱ", "edie/negative/strong/_" (edie 의 '_' 는 공백용 음원)
+
+기존 폴더(samples/, sounds_korean/, new_emotion_sounds/)에서 변환:
+
+    python sound_bank.py
+"""
+import argparse
+import json
+import os
+import threading
+import wave
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(__file__)
+SOUND_BANK_PATH = os.getenv("SOUND_BANK_PATH", os.path.join(BASE_DIR, "sound_bank"))
+
+
+class SoundEntry(NamedTuple):
+    pcm: np.ndarray   # mmap 위의 int16 view (복사 없음)
+    rate: int
+    channels: int
+
+
+class PackedSoundBank:
+    """packed 뱅크 읽기 전용 뷰"""
+
+    def __init__(self, path: str = SOUND_BANK_PATH):
+        self.path = path
+        with open(f"{path}.json", encoding="utf-8") as f:
+            self._index: Dict[str, List[int]] = json.load(f)
+        self._pcm = np.memmap(f"{path}.pcm", dtype=np.int16, mode="r")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, key: str) -> Optional[SoundEntry]:
+        item = self._index.get(key)
+        if item is None:
+            return None
+        offset, length, rate, channels = item
+        return SoundEntry(self._pcm[offset:offset + length], rate, channels)
+
+    def keys(self, prefix: str = "") -> List[str]:
+        """prefix 로 시작하는 key 목록 (정렬됨)"""
+        return sorted(k for k in self._index if k.startswith(prefix))
+
+    def items(self, prefix: str) -> Dict[str, SoundEntry]:
+        """prefix 를 뗀 이름 → SoundEntry"""
+        return {k[len(prefix):]: self.get(k) for k in self.keys(prefix)}
+
+
+def write_packed_bank(path: str, entries: Iterable[Tuple[str, np.ndarray, int, int]]):
+    """(key, int16 PCM, rate, channels) 들을 packed 뱅크로 저장"""
+    index = {}
+    offset = 0
+    tmp_pcm = f"{path}.pcm.tmp"
+    with open(tmp_pcm, "wb") as f:
+        for key, pcm, rate, channels in entries:
+            data = np.ascontiguousarray(pcm, dtype=np.int16)
+            f.write(data.tobytes())
+            index[key] = [offset, len(data), int(rate), int(channels)]
+            offset += len(data)
+    with open(f"{path}.json.tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    # 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 마지막에 교체
+    os.replace(tmp_pcm, f"{path}.pcm")
+    os.replace(f"{path}.json.tmp", f"{path}.json")
+    return index
+
+
+_BANK: Optional[PackedSoundBank] = None
+_BANK_LOADED = False
+_BANK_LOCK = threading.Lock()
+
+
+def get_sound_bank() -> Optional[PackedSoundBank]:
+    """프로세스 전역 packed 뱅크 (파일이 없으면 None → 각 엔진이 기존 폴더에서 로드)"""
+    global _BANK, _BANK_LOADED
+    if not _BANK_LOADED:
+        with _BANK_LOCK:
+            if not _BANK_LOADED:
+                if os.path.isfile(f"{SOUND_BANK_PATH}.json") and os.path.isfile(f"{SOUND_BANK_PATH}.pcm"):
+                    try:
+                        _BANK = PackedSoundBank(SOUND_BANK_PATH)
+                    except Exception as e:
+                        print(f"[경고] {SOUND_BANK_PATH} 로드 실패 → {e}")
+                _BANK_LOADED = True
+    return _BANK
+
+
+# ------------------------------------------------------------------------
+# 기존 폴더 → packed 뱅크 변환
+# ------------------------------------------------------------------------
+def _nook_entries():
+    from get_nook import NookSampleBank
+
+    bank = NookSampleBank(allow_gtts=False, use_packed=False).load()
+    for letter, (pcm, rate) in bank.items():
+        yield f"nook/{letter}", pcm, rate, 1
+
+
+def _r2d2_entries(base_dir=BASE_DIR):
+    from get_r2d2 import SOUND_DIR
+
+    sound_dir = os.path.join(base_dir, SOUND_DIR)
+    if not os.path.isdir(sound_dir):
+        return
+    for name in sorted(os.listdir(sound_dir)):
+        key, ext = os.path.splitext(name)
+        if ext != ".wav":
+            continue
+        with wave.open(os.path.join(sound_dir, name), "rb") as f:
+            pcm = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+            yield f"r2d2/{key}", pcm, f.getframerate(), f.getnchannels()
+
+
+def _edie_entries():
+    from get_edie import CHANNELS, DEFAULT_RATE, SOUND_ROOT, _decode_wav
+
+    for root, _, files in sorted(os.walk(SOUND_ROOT)):
+        if "_.wav" not in files:
+            continue
+        emotion_path = os.path.relpath(root, SOUND_ROOT).replace(os.sep, "/")
+        for name in sorted(files):
+            if not name.endswith(".wav"):
+                continue
+            try:
+                raw = _decode_wav(os.path.join(root, name), DEFAULT_RATE)
+            except Exception as e:
+                print(f"[경고] {name} 로드 실패 → {e}")
+                continue
+            yield f"edie/{emotion_path}/{name[:-4]}", np.frombuffer(raw, dtype=np.int16), DEFAULT_RATE, CHANNELS
+
+
+def build_from_directories(path: str = SOUND_BANK_PATH, voices=("nook", "r2d2", "edie")):
+    sources = {"nook": _nook_entries, "r2d2": _r2d2_entries, "edie": _edie_entries}
+
+    def entries():
+        for voice in voices:
+            yield from sources[voice]()
+
+    return write_packed_bank(path, entries())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기존 음원 폴더 → packed 사운드 뱅크 변환")
+    parser.add_argument("--output", default=SOUND_BANK_PATH, help="확장자 없는 경로 (.pcm/.json 생성)")
+    parser.add_argument("--voices", nargs="+", default=["nook", "r2d2", "edie"],
+                        choices=["nook", "r2d2", "edie"])
+    args = parser.parse_args()
+
+    index = build_from_directories(args.output, tuple(args.voices))
+    size = os.path.getsize(f"{args.output}.pcm")
+    print(f"저장 완료: {args.output}.pcm / .json ({len(index)}개, {size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,27 +2,27 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 import streamlit as st
-import time
-import re 
 
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+# (체인 / ChatOpenAI 관련 langchain, openai 는 create_chatbot 에서 import → 첫 화면이 기다리지 않음)
 from langchain_community.chat_message_histories import StreamlitChatMessageHistory
-from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain_openai import ChatOpenAI
-from langchain_core.output_parsers import StrOutputParser
 
 # TTS 관련 imports
-from gtts import gTTS
-import random
-import base64
-import io
+from functools import partial
 
 # from prompts.prompt import SYSTEM_PROMPT
 from prompts.prompt import PROMPT_DICT
-
-# r2-d2 스타일 임포트
-from get_r2d2 import generate_r2d2_voice
-from get_edie import generate_edie_voice
+from llm_cache import with_response_cache
+from llm_clients import get_chat_llm, preload_llm_modules
+from chat_context import current_session_id, get_context_window
+
+# 너굴 / r2-d2 / edie 스타일 합성 (스레드/프로세스 풀에서 실행)
+from voice_engines import resolve_voice_emotion, synthesize_voice_wav, voice_cache_key
+from synthesis_executor import get_synthesis_executor
+from voice_pipeline import SentenceVoicePipeline
+from audio_encoder import AUDIO_FORMAT, MIME_TYPES, encode_audio
+from audio_cache import get_audio_cache
+from media_player import render_audio, render_audio_segment
+from latency_metrics import TurnTrace, stage_percentiles, start_metrics_server
 from pydub import AudioSegment
 AudioSegment.converter = "/usr/bin/ffmpeg"
 AudioSegment.ffprobe = "/usr/bin/ffprobe"
@@ -51,87 +51,42 @@ def create_directories():
 
 create_directories()
 
-# 너굴이 음성 생성 함수
-@st.cache_data
-def generate_nook_voice(text, lang='ko', random_factor=0.35, normal_frame_rate=44100):
-    """너굴이 스타일 음성 생성 (특수문자/숫자는 짧은 무음으로 처리)"""
-    if not text.strip():
-        return None
-
-    result_sound = None
-    short_silence = AudioSegment.silent(duration=150)  # 0.15초 짧은 무음
-
-    for i, letter in enumerate(text):
-        if letter == ' ':  # 공백
-            new_sound = AudioSegment.silent(duration=200)  # 0.2초 무음
-        elif not (letter.isalpha() or '\uAC00' <= letter <= '\uD7A3'):  # 한글 또는 영문이 아니면 = 특수문자/숫자
-            new_sound = short_silence
-        else:
-            letter_file = f'samples/{letter}.mp3'
-            if not os.path.isfile(letter_file):
-                try:
-                    tts = gTTS(letter, lang=lang)
-                    tts.save(letter_file)
-                except Exception as e:
-                    st.error(f"TTS 생성 실패: {letter} - {e}")
-                    continue
-            try:
-                letter_sound = AudioSegment.from_mp3(letter_file)
-                if len(letter_sound.raw_data) > 10000:
-                    raw = letter_sound.raw_data[5000:-5000]
-                else:
-                    raw = letter_sound.raw_data
-                    
-                octaves = 1.5 + random.random() * random_factor
-                # octaves = 1.0 + random.uniform(0, random_factor)
-
-                frame_rate = int(letter_sound.frame_rate * (2.5 ** octaves))
-                new_sound = letter_sound._spawn(raw, overrides={'frame_rate': frame_rate})
-                
-            except Exception as e:
-                st.error(f"음성 처리 실패: {letter} - {e}")
-                continue
-
-        if 'new_sound' in locals():
-            new_sound = new_sound.set_frame_rate(normal_frame_rate)
-            result_sound = new_sound if result_sound is None else result_sound + new_sound
-
-    return result_sound
-
-# 오디오를 base64로 인코딩하여 HTML에서 재생할 수 있게 함
-def audio_to_base64(audio_segment):
-    """AudioSegment를 base64 문자열로 변환"""
-    buffer = io.BytesIO()
-    audio_segment.export(buffer, format="mp3")
-    audio_base64 = base64.b64encode(buffer.getvalue()).decode()
-    return audio_base64
-
-# Streamlit용 채팅 히스토리 설정
-@st.cache_resource
+# 합성된 음성 캐시 (메모리 + 디스크, 모든 세션/프로세스 공유)
+audio_cache = get_audio_cache()
+
+# 단계별 지연 시간 / 캐시 카운터 스크레이프용 /metrics (METRICS_PORT 지정 시, 프로세스당 한 번)
+start_metrics_server()
+
+# Streamlit용 채팅 히스토리 설정 (세션마다 자신의 st.session_state 에 저장)
 def get_chat_history():
     return StreamlitChatMessageHistory(key="chat_messages")
 
 def get_session_history(session_id: str):
+    # session_id = 현재 Streamlit 세션 ID (current_session_id), 히스토리는 그 세션 상태에 있음
     return get_chat_history()
 
 # OpenAI 챗봇 설정 -------------------------------------
+@st.cache_resource(show_spinner=False)  # (모델, temperature, 페르소나) 별로 프로세스당 한 번만 생성
 def create_chatbot(model_name="gpt-3.5-turbo", temperature=0.7, voice_style="일반"):
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+    from langchain_core.runnables import RunnableLambda
+    from langchain_core.runnables.history import RunnableWithMessageHistory
+    from langchain_core.output_parsers import StrOutputParser
+
     # 프롬프트 템플릿 설정
+    system_prompt = PROMPT_DICT.get(voice_style, PROMPT_DICT["일반"])
     prompt = ChatPromptTemplate.from_messages([
-        ("system", PROMPT_DICT.get(voice_style, PROMPT_DICT["일반"])),
+        ("system", system_prompt),
         MessagesPlaceholder(variable_name="history"),
         ("human", "{input}")
     ])
     
-    # ChatOpenAI 모델 설정
-    llm = ChatOpenAI(
-        openai_api_key=os.getenv("OPENAI_API_KEY"),
-        model=model_name,
-        temperature=temperature
-    )
+    # ChatOpenAI 모델 (모델/temperature 별로 하나, 연결 풀 공유)
+    llm = get_chat_llm(model_name, temperature)
     
     # 체인 구성
-    chain = prompt | llm | StrOutputParser()
+    # (히스토리는 CHAT_CONTEXT_POLICY 에 맞게 잘라서 프롬프트에 넣음)
+    chain = RunnableLambda(get_context_window()) | prompt | llm | StrOutputParser()
     
     # 메시지 히스토리와 함께 실행 가능한 체인 생성
     with_message_history = RunnableWithMessageHistory(
@@ -141,7 +96,10 @@ def create_chatbot(model_name="gpt-3.5-turbo", temperature=0.7, voice_style="일
         history_messages_key="history",
     )
     
-    return with_message_history
+    # (선택) 같은 요청은 LLM 호출 없이 캐시된 답변 사용
+    return with_response_cache(
+        with_message_history, get_session_history, system_prompt, model_name, temperature
+    )
 
 # 사이드바 설정 --------------------------------------------------
 with st.sidebar:
@@ -184,6 +142,17 @@ with st.sidebar:
     if st.button("🗑️ 대화 초기화"):
         get_chat_history().clear()
         st.rerun()
+
+    # 단계별 지연 시간 (최근 턴들의 p50 / p95, ms)
+    if st.checkbox("⏱️ 지연 시간 보기", value=False):
+        stats = stage_percentiles()
+        if stats:
+            st.table([
+                {"단계": stage, "p50": round(v["p50"], 1), "p95": round(v["p95"], 1), "n": v["count"]}
+                for stage, v in stats.items()
+            ])
+        else:
+            st.caption("아직 기록된 턴이 없습니다.")
     
     st.markdown("---")
     st.markdown("💡 **동물의 숲 '너굴'과 스타워즈의 'r2-d2'와 대화해보세요.**")
@@ -205,13 +174,6 @@ for message in msgs.messages:
     with st.chat_message(message.type):
         st.markdown(message.content)
 
-# 챗봇 설정
-chatbot = create_chatbot(
-    model_name=model_name, 
-    temperature=temperature,
-    voice_style=voice_style
-    )
-
 # ------------------------------------------------------------------------------------------
 
 
@@ -222,91 +184,115 @@ if user_input := st.chat_input("메시지를 입력하세요..."):
     if not os.getenv("OPENAI_API_KEY"):
         st.error("OPENAI_API_KEY가 .env 파일에 설정되지 않았습니다.")
         st.stop()
+
+    # 챗봇 설정 (첫 메시지에서 생성 → 이후는 캐시, 첫 화면 렌더는 LLM 클라이언트 import 를 기다리지 않음)
+    chatbot = create_chatbot(
+        model_name=model_name, 
+        temperature=temperature,
+        voice_style=voice_style
+        )
     
     # 사용자 메시지 표시
     with st.chat_message("user"):
         st.markdown(user_input)
 
+    # 이번 턴의 단계별 시간 기록 (세션 / 페르소나 / 모델과 함께)
+    trace = TurnTrace(current_session_id(), voice_style, model_name)
+
     # AI 응답 생성 및 표시
     with st.chat_message("assistant"):
         message_placeholder = st.empty()
+        # 음성 파이프라인: 스트리밍 중 완성된 문장부터 바로 합성 시작
+        voice_pipeline = None
+        if enable_voice:
+            voice_pipeline = SentenceVoicePipeline(
+                partial(synthesize_voice_wav, voice_style=voice_style, random_factor=voice_random_factor),
+                executor=get_synthesis_executor(),
+                resolve_emotion=partial(resolve_voice_emotion, voice_style=voice_style),
+            ).start()
         try:
-            # AI 응답 생성
-            response = chatbot.invoke(
+            # AI 응답 스트리밍 (토큰이 도착하는 대로 표시, 히스토리는 스트림 종료 시 자동 저장)
+            response = ""
+            for chunk in chatbot.stream(
                 {"input": user_input},
-                config={"configurable": {"session_id": "default"}}
-            )
-            
-            # 타이핑 효과로 응답 표시
-            displayed_response = ""
-            for word in response.split():
-                displayed_response += word + " "
-                time.sleep(0.05)
-                message_placeholder.markdown(displayed_response + "▌")
+                config={"configurable": {"session_id": current_session_id()}}
+            ):
+                trace.mark("llm_first_token")
+                response += chunk
+                message_placeholder.markdown(response + "▌")
+                if voice_pipeline:
+                    voice_pipeline.feed(chunk)
+                    # 합성이 끝난 문장은 답변이 끝나기 전에 바로 재생
+                    for segment in voice_pipeline.ready_segments():
+                        trace.mark("first_audio")
+                        render_audio_segment(segment, "audio/wav")
             
+            trace.mark("llm_total")
+
             # 최종 응답 표시
             message_placeholder.markdown(response)
             
             # 음성 생성 및 재생
-            if enable_voice and response.strip():
-                # 감정 표현 제거 (감정은 항상 가로안에 표현되며 표현할 수 있는 감정은 'positive', 'negative', 'neutral')
-                match = re.search(r"^\(([^)]+)\)", response)
-                emotion = match.group(1) if match else "neutral"  # 못 찾으면 기본값
-                
-
-                # 괄호 제거한 텍스트
-                cleaned_response = re.sub(r"^\([^)]+\)\s*", "", response).strip()
-                
+            # (감정은 항상 가로안에 표현되며 파이프라인이 떼어내 edie 음원 선택에 사용)
+            if voice_pipeline and response.strip():
                 with st.spinner(f"{voice_style} 목소리 생성 중..."):
                     try:
-                        if voice_style == "일반":
-                            tts = gTTS(cleaned_response, lang='ko')
-                            tts_fp = io.BytesIO()
-                            tts.write_to_fp(tts_fp)
-                            tts_fp.seek(0)
-                            audio_seg = AudioSegment.from_file(tts_fp, format="mp3")
-                        elif voice_style == "너굴":
-                            audio_seg = generate_nook_voice(
-                                cleaned_response, 
-                                random_factor=voice_random_factor
-                            )
-                        elif voice_style == "r2-d2":
-                            base_dir = os.path.dirname(__file__)
-                            audio_seg = generate_r2d2_voice(
-                                cleaned_response,
-                                base_dir
-                            )
-                        elif voice_style == "edie":
-                            audio_seg = generate_edie_voice(
-                                cleaned_response,
-                                emotion
+                        with trace.stage("synthesis"):
+                            # 남은 문장도 합성이 끝나는 대로 바로 재생
+                            voice_pipeline.finish()
+                            for segment in voice_pipeline.ready_segments(wait=True):
+                                trace.mark("first_audio")
+                                render_audio_segment(segment, "audio/wav")
+                            # 다운로드 / 캐시용으로 문장별 음성을 하나로 이어 붙임
+                            audio_seg = voice_pipeline.close()
+                        trace.add("emotion_parse", voice_pipeline.parse_seconds)
+                        trace.add("synthesis_cpu", voice_pipeline.synthesis_seconds)
+                        if voice_pipeline.errors:
+                            # 일부 문장만 실패해도 그 문장이 빠진 음성이 되므로 알림
+                            trace.set("voice_error", str(voice_pipeline.errors[0]))
+                            st.warning(
+                                f"일부 문장({len(voice_pipeline.errors)}개)의 음성 생성에 실패해 음성에서 빠졌습니다."
                             )
                             
                         if audio_seg:
-                            audio_base64 = audio_to_base64(audio_seg)
-                            audio_html = f"""
-                            <audio autoplay>
-                                <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
-                            </audio>
-                            """
-                            st.markdown(audio_html, unsafe_allow_html=True)
-                            st.download_button(
-                                label="🔊 음성 다운로드",
-                                data=base64.b64decode(audio_base64),
-                                file_name=f"{voice_style}_voice_{int(time.time())}.mp3",
-                                mime="audio/mp3"
+                            # 같은 답변이면 캐시된 최종 바이트를 그대로 사용 (인코딩 생략)
+                            clip_key = voice_cache_key(
+                                voice_pipeline.text, voice_style, voice_pipeline.emotion,
+                                voice_random_factor, AUDIO_FORMAT
+                            )
+                            audio_data = audio_cache.get(clip_key)
+                            trace.set("clip_cache", "miss" if audio_data is None else "hit")
+                            if audio_data is None:
+                                with trace.stage("encoding"):
+                                    audio_data = get_synthesis_executor().submit(encode_audio, audio_seg).result().data
+                                audio_cache.put(clip_key, audio_data)
+                            trace.set("payload_bytes", len(audio_data))
+
+                            # 문장별로 이미 재생했으므로 전체 클립은 다시 듣기 / 다운로드용 (자동 재생 안 함)
+                            render_audio(
+                                audio_data,
+                                MIME_TYPES[AUDIO_FORMAT],
+                                extension=AUDIO_FORMAT,
+                                download_prefix=f"{voice_style}_voice",
+                                autoplay=False,
                             )
                         else:
                             st.warning("음성 생성에 실패했습니다.")
 
                     except Exception as e:
+                        trace.set("voice_error", str(e))
                         st.error(f"음성 생성 오류: {str(e)}")
             
         except Exception as e:
             st.error(f"오류가 발생했습니다: {str(e)}")
+            trace.set("error", str(e))
+            if voice_pipeline:
+                voice_pipeline.cancel()
             error_response = "죄송합니다. 응답을 생성하는 중 오류가 발생했습니다."
             message_placeholder.markdown(error_response)
 
+    trace.finish()
+
 # 하단 정보
 st.markdown("---")
 st.markdown(
@@ -320,3 +306,6 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+
+# 첫 화면을 다 그린 뒤 첫 메시지에 필요한 LLM 모듈을 백그라운드에서 미리 import (프로세스당 한 번)
+preload_llm_modules()
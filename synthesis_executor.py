@@ -0,0 +1,47 @@
+# synthesis_executor.py
+"""
+음성 합성 / 인코딩 작업을 Streamlit 스크립트 스레드 밖에서 돌리는 공용 실행기
+
+    SYNTH_EXECUTOR=thread   (기본) 스레드 풀 - gTTS 처럼 네트워크 대기가 많은 경우
+    SYNTH_EXECUTOR=process  프로세스 풀 - 너굴/r2-d2/edie 같은 CPU 작업을 여러 코어로 분산
+    SYNTH_WORKERS=4         워커 수 (기본: CPU 코어 수)
+
+프로세스 풀 워커는 처음 합성할 때 사운드 뱅크를 한 번 로드한 뒤 계속 재사용
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+SYNTH_EXECUTOR = os.getenv("SYNTH_EXECUTOR", "thread")
+SYNTH_WORKERS = int(os.getenv("SYNTH_WORKERS", str(os.cpu_count() or 4)))
+
+_executor: Optional[Executor] = None
+_lock = threading.Lock()
+
+
+def create_executor(
+    kind: str = SYNTH_EXECUTOR,
+    workers: int = SYNTH_WORKERS,
+    initializer: Optional[Callable[[], None]] = None,
+) -> Executor:
+    """initializer: 워커마다 시작할 때 한 번 실행 (예: 사운드 뱅크 미리 로드)"""
+    if kind == "process":
+        # Streamlit 서버는 스레드가 많아서 fork 대신 spawn
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=initializer
+        )
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="synth", initializer=initializer)
+    raise ValueError(f"알 수 없는 SYNTH_EXECUTOR: {kind} (thread | process)")
+
+
+def get_synthesis_executor() -> Executor:
+    """프로세스 전역 합성 실행기 (모든 세션 공유)"""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = create_executor()
+    return _executor
@@ -0,0 +1,158 @@
+# voice_engines.py
+"""
+음성 스타일별 합성 함수 모음 (Streamlit 에 의존하지 않음)
+
+- 합성 워커(스레드/프로세스 풀)에서 그대로 호출할 수 있도록 모두 모듈 최상위 함수
+- synthesize_voice_wav 는 오디오 캐시를 거쳐 WAV bytes 를 돌려줌 (프로세스 간 전달이 가벼움)
+- render_batch 는 여러 요청을 워커 한 번 호출로 처리 (voice_service.py 마이크로 배치용)
+- 엔진 모듈(gTTS / 너굴 / r2-d2 / edie)은 그 스타일을 처음 합성할 때 import
+    (한 가지 스타일만 쓰는 세션·워커는 나머지 엔진과 numpy 사운드 뱅크 코드를 올리지 않음)
+"""
+import io
+import os
+from typing import List, Optional, Tuple
+
+from pydub import AudioSegment
+
+from audio_cache import audio_cache_key, get_audio_cache
+from audio_encoder import ENCODERS, encode_wav
+
+BASE_DIR = os.path.dirname(__file__)
+VOICE_STYLES = ["일반", "너굴", "r2-d2", "edie"]
+
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def voice_engine_version(voice_style):
+    """
+    같은 요청이라도 결과를 바꾸는 엔진 설정 / 뱅크 파일 버전 (캐시 key 용)
+        - packed 사운드 뱅크(sound_bank.pcm), 너굴은 NOOK_ENGINE(table 이면 단계 수) + nook_bank.npz
+        - 뱅크 파일은 mtime 으로 구분 → 다시 만들면 예전 클립을 쓰지 않음
+    """
+    if voice_style == "일반":
+        return None
+    from sound_bank import SOUND_BANK_PATH
+    version = [_mtime_ns(f"{SOUND_BANK_PATH}.pcm")]
+    if voice_style == "너굴":
+        from get_nook import BANK_PATH, NOOK_ENGINE, NOOK_PITCH_BUCKETS
+        version += [NOOK_ENGINE, NOOK_PITCH_BUCKETS if NOOK_ENGINE == "table" else None, _mtime_ns(BANK_PATH)]
+    return version
+
+
+def voice_cache_key(text, voice_style, emotion, random_factor, audio_format, seed=None):
+    """
+    결과에 영향을 주는 값만 key 에 포함 (감정은 edie, 변조 강도는 너굴만)
+        - 엔진이 결정적이라 seed=None(텍스트로 정해지는 기본 시드)도 그대로 key 가 됨
+        - 엔진 / 뱅크 버전도 포함 (디스크 캐시는 재시작 후에도 남으므로)
+    """
+    return audio_cache_key(
+        voice_style,
+        text,
+        emotion=emotion if voice_style == "edie" else None,
+        random_factor=random_factor if voice_style == "너굴" else None,
+        seed=seed if voice_style != "일반" else None,
+        audio_format=audio_format,
+        engine=voice_engine_version(voice_style),
+    )
+
+
+def resolve_voice_emotion(emotion, text, voice_style="일반"):
+    """
+    답변 전체에 쓸 감정 값을 한 번 정함 (문장 단위 합성 시 첫 문장에서 호출)
+        - edie 의 negative 는 strong / weak 폴더를 여기서 골라 모든 문장에 같은 폴더를 씀
+    """
+    if voice_style != "edie":
+        return emotion
+    from get_edie import pick_emotion_bank
+    return pick_emotion_bank(emotion, text)
+
+
+def synthesize_voice(text, voice_style, emotion="neutral", random_factor=0.35, seed=None) -> Optional[AudioSegment]:
+    """voice_style 에 맞는 엔진으로 text 를 합성해 AudioSegment 로 반환 (seed 는 gTTS 외 엔진용)"""
+    if voice_style == "일반":
+        from gtts import gTTS
+        tts = gTTS(text, lang='ko')
+        tts_fp = io.BytesIO()
+        tts.write_to_fp(tts_fp)
+        tts_fp.seek(0)
+        return AudioSegment.from_file(tts_fp, format="mp3")
+    if voice_style == "너굴":
+        from get_nook import generate_nook_voice
+        return generate_nook_voice(text, random_factor=random_factor, seed=seed)
+    if voice_style == "r2-d2":
+        from get_r2d2 import generate_r2d2_voice
+        return generate_r2d2_voice(text, BASE_DIR, seed=seed)
+    if voice_style == "edie":
+        from get_edie import generate_edie_voice
+        return generate_edie_voice(text, emotion, random_seed=seed)
+    return None
+
+
+def synthesize_voice_wav(text, emotion="neutral", voice_style="일반", random_factor=0.35, seed=None) -> Optional[bytes]:
+    """
+    문장 단위 합성 + 캐시 (같은 문장은 다시 합성하지 않음)
+        - WAV 로 보관하므로 읽을 때 ffmpeg 가 필요 없음
+    """
+    cache = get_audio_cache()
+    key = voice_cache_key(text, voice_style, emotion, random_factor, "wav", seed)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    audio_seg = synthesize_voice(text, voice_style, emotion, random_factor=random_factor, seed=seed)
+    if audio_seg is None:
+        return None
+    data = encode_wav(audio_seg)
+    cache.put(key, data)
+    return data
+
+
+def render_voice(text, voice_style="일반", emotion="neutral", random_factor=0.35, audio_format="wav",
+                 seed=None) -> Optional[bytes]:
+    """합성 + 최종 포맷 인코딩 (결과 바이트를 포맷별로 캐시)"""
+    if audio_format == "wav":
+        return synthesize_voice_wav(text, emotion, voice_style, random_factor, seed)
+    cache = get_audio_cache()
+    key = voice_cache_key(text, voice_style, emotion, random_factor, audio_format, seed)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    wav = synthesize_voice_wav(text, emotion, voice_style, random_factor, seed)
+    if wav is None:
+        return None
+    data = ENCODERS[audio_format](AudioSegment.from_wav(io.BytesIO(wav)))
+    cache.put(key, data)
+    return data
+
+
+def render_batch(requests: List[tuple]) -> List[Tuple[bool, object]]:
+    """
+    ➡ 요청 여러 개를 한 번에 합성 (워커 호출 / 프로세스 간 전달을 배치당 한 번으로)
+       - requests: render_voice 인자 튜플 목록
+       - 결과: 요청 순서대로 (성공 여부, bytes | None | 오류 메시지)
+    """
+    results = []
+    for args in requests:
+        try:
+            results.append((True, render_voice(*args)))
+        except Exception as e:
+            results.append((False, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def warm_up():
+    """사운드 뱅크를 미리 메모리에 올림 (워커 시작 시 한 번)"""
+    from get_edie import DEFAULT_RATE as EDIE_RATE, get_emotion_bank
+    from get_nook import NOOK_ENGINE, get_nook_bank, get_variant_table
+    from get_r2d2 import _load_frames
+
+    get_nook_bank()
+    if NOOK_ENGINE == "table":
+        get_variant_table(0.35)  # UI 기본 변조 강도
+    _load_frames(BASE_DIR)
+    for emotion_path in ("neutral", "positive", os.path.join("negative", "strong"), os.path.join("negative", "weak")):
+        get_emotion_bank(emotion_path, EDIE_RATE)
@@ -0,0 +1,218 @@
+# voice_pipeline.py
+import io
+import re
+import time
+import wave
+from concurrent.futures import Executor, Future
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple, Union
+
+from synthesis_executor import get_synthesis_executor
+
+if TYPE_CHECKING:
+    from pydub import AudioSegment
+
+DEFAULT_EMOTION = "neutral"
+
+# 문장 끝: 마침표/느낌표/물음표/물결/말줄임표 (+닫는 따옴표·괄호) 뒤의 공백, 또는 줄바꿈
+_SENTENCE_BOUNDARY = re.compile(r"[.!?~…]+[\"'”’)\]]*\s+|\n+")
+_EMOTION_PREFIX = re.compile(r"^\s*\(([^)]+)\)\s*")
+
+
+def parse_emotion(response: str) -> Tuple[str, str]:
+    """
+    응답 맨 앞의 '(감정)' 표시를 떼어내 (감정, 나머지 텍스트)를 반환
+        - 감정 표시가 없으면 DEFAULT_EMOTION
+    """
+    match = _EMOTION_PREFIX.match(response)
+    if not match:
+        return DEFAULT_EMOTION, response.strip()
+    return match.group(1).strip(), response[match.end():].strip()
+
+
+def split_sentences(buffer: str) -> Tuple[List[str], str]:
+    """
+    버퍼에서 완성된 문장들과 아직 끝나지 않은 나머지를 분리
+        - 구두점 뒤에 공백이 와야 문장 끝으로 본다 ("3.14" 같은 숫자는 자르지 않음)
+    """
+    sentences = []
+    start = 0
+    for match in _SENTENCE_BOUNDARY.finditer(buffer):
+        sentence = buffer[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    return sentences, buffer[start:]
+
+
+def _pcm_of(result) -> Tuple[bytes, Tuple[int, int, int]]:
+    """합성 결과(WAV bytes | AudioSegment) → (raw PCM, (frame_rate, channels, sample_width))"""
+    if isinstance(result, (bytes, bytearray)):
+        with wave.open(io.BytesIO(result), "rb") as f:
+            return f.readframes(f.getnframes()), (f.getframerate(), f.getnchannels(), f.getsampwidth())
+    return result.raw_data, (result.frame_rate, result.channels, result.sample_width)
+
+
+def _wav_of(result) -> bytes:
+    """합성 결과 → 바로 재생할 수 있는 WAV bytes"""
+    if isinstance(result, (bytes, bytearray)):
+        return bytes(result)
+    from audio_encoder import pcm_to_wav
+    return pcm_to_wav(result.raw_data, result.frame_rate, result.channels, result.sample_width)
+
+
+def _timed_synthesize(synthesize: Callable, sentence: str, emotion: str):
+    """워커에서 실행: (합성 결과, 걸린 초) (프로세스 풀로도 보낼 수 있도록 모듈 최상위 함수)"""
+    start = time.perf_counter()
+    result = synthesize(sentence, emotion)
+    return result, time.perf_counter() - start
+
+
+class SentenceVoicePipeline:
+    """
+    ➡ 스트리밍되는 LLM 응답을 문장 단위로 잘라 바로바로 음성 합성
+       - feed() 로 토큰을 넣으면, 완성된 문장은 합성 실행기(스레드/프로세스 풀)에 바로 제출
+       - LLM 이 다음 문장을 쓰는 동안 앞 문장의 합성이 끝나 있음
+       - ready_segments() 로 합성이 끝난 문장을 순서대로 꺼내 답변이 끝나기 전에 바로 재생
+       - close() 에서 남은 텍스트를 마저 합성하고 문장 순서대로 하나의 AudioSegment 로 이어 붙임
+         (문장별 raw PCM 을 한 번에 join → 문장 수가 많아도 복사는 한 번)
+
+    synthesize(text, emotion) -> AudioSegment | WAV bytes | None
+        (프로세스 풀을 쓰면 모듈 최상위 함수 또는 그 functools.partial 이어야 함)
+    resolve_emotion(emotion, first_sentence) -> 모든 문장에 넘길 감정 값 (답변당 한 번, 예: edie 의 negative 폴더)
+    """
+
+    def __init__(
+        self,
+        synthesize: Callable[[str, str], Union["AudioSegment", bytes, None]],
+        executor: Optional[Executor] = None,
+        resolve_emotion: Optional[Callable[[str, str], str]] = None,
+    ):
+        self._synthesize = synthesize
+        self._executor = executor
+        self._resolve_emotion = resolve_emotion
+        self._futures: List[Future] = []
+        self._buffer = ""
+        self._prefix_done = False
+        self._delivered = 0  # ready_segments() 로 내보낸 문장 수
+        self.emotion = DEFAULT_EMOTION
+        self.voice_emotion: Optional[str] = None  # 합성에 넘기는 감정 (첫 문장에서 한 번 정함)
+        self.text = ""  # 감정 표시를 뗀 전체 텍스트
+        self.errors: List[Exception] = []
+        self.parse_seconds = 0.0       # 감정 표시 파싱에 쓴 시간
+        self.synthesis_seconds = 0.0   # 워커에서 문장 합성에 쓴 시간 합계
+
+    def start(self) -> "SentenceVoicePipeline":
+        if self._executor is None:
+            self._executor = get_synthesis_executor()
+        return self
+
+    def _take_emotion_prefix(self) -> bool:
+        """'(감정)' 접두어가 다 들어올 때까지 기다렸다가 한 번만 떼어냄"""
+        stripped = self._buffer.lstrip()
+        if not stripped:
+            return False
+        if stripped.startswith("("):
+            if ")" not in stripped:
+                return False
+            match = _EMOTION_PREFIX.match(stripped)
+            if match:
+                # 뒤 공백은 남김 (첫 문장의 끝 판정에 필요)
+                self.emotion, self._buffer = match.group(1).strip(), stripped[match.end():]
+        self._prefix_done = True
+        return True
+
+    def feed(self, chunk: str):
+        """스트리밍 토큰 추가 → 완성된 문장은 합성 실행기로"""
+        self._buffer += chunk
+        if not self._prefix_done:
+            start = time.perf_counter()
+            done = self._take_emotion_prefix()
+            self.parse_seconds += time.perf_counter() - start
+            if not done:
+                return
+        sentences, self._buffer = split_sentences(self._buffer)
+        for sentence in sentences:
+            self._submit(sentence)
+
+    def _submit(self, sentence: str):
+        if self.voice_emotion is None:
+            self.voice_emotion = (
+                self._resolve_emotion(self.emotion, sentence) if self._resolve_emotion else self.emotion
+            )
+        self.text = f"{self.text} {sentence}" if self.text else sentence
+        self._futures.append(
+            self._executor.submit(_timed_synthesize, self._synthesize, sentence, self.voice_emotion)
+        )
+
+    def finish(self):
+        """스트림이 끝남 → 문장 부호 없이 남은 텍스트도 합성 실행기로"""
+        if not self._prefix_done:
+            self._take_emotion_prefix()
+            self._prefix_done = True
+        rest = self._buffer.strip()
+        self._buffer = ""
+        if rest:
+            self._submit(rest)
+
+    def ready_segments(self, wait: bool = False) -> List[bytes]:
+        """
+        아직 내보내지 않은 문장 중 앞에서부터 합성이 끝난 것들의 WAV bytes (문장 순서 유지)
+            - wait=True 면 남은 문장이 모두 끝날 때까지 기다림
+            - 실패한 문장은 건너뜀 (오류는 close() 에서 errors 로 모음)
+        """
+        segments = []
+        while self._delivered < len(self._futures):
+            future = self._futures[self._delivered]
+            if not wait and not future.done():
+                break
+            self._delivered += 1
+            try:
+                result, _ = future.result()
+            except Exception:
+                continue
+            if result is not None:
+                segments.append(_wav_of(result))
+        return segments
+
+    def close(self) -> Optional["AudioSegment"]:
+        """남은 텍스트까지 합성하고, 문장별 음성을 순서대로 이어 붙여 반환"""
+        self.finish()
+
+        parts = []  # 문장 순서대로 (raw PCM, 형식)
+        for future in self._futures:
+            try:
+                result, seconds = future.result()
+            except Exception as e:
+                self.errors.append(e)
+                continue
+            self.synthesis_seconds += seconds
+            if result is not None:
+                parts.append(_pcm_of(result))
+        self._futures = []
+        self._delivered = 0
+
+        if not parts:
+            if self.errors:
+                raise self.errors[0]
+            return None
+
+        from pydub import AudioSegment
+        frame_rate, channels, sample_width = params = parts[0][1]
+        pcm = []
+        for raw, raw_params in parts:
+            if raw_params != params:  # 형식이 다른 문장(드묾)만 첫 문장 형식으로 변환
+                rate, chans, width = raw_params
+                raw = (
+                    AudioSegment(raw, frame_rate=rate, channels=chans, sample_width=width)
+                    .set_frame_rate(frame_rate).set_channels(channels).set_sample_width(sample_width)
+                    .raw_data
+                )
+            pcm.append(raw)
+        return AudioSegment(b"".join(pcm), frame_rate=frame_rate, channels=channels, sample_width=sample_width)
+
+    def cancel(self):
+        """LLM 오류 등으로 중단할 때 아직 시작하지 않은 합성 취소"""
+        for future in self._futures:
+            future.cancel()
+        self._futures = []
+        self._delivered = 0
@@ -0,0 +1,23 @@
+# voice_rng.py
+"""
+음성 엔진용 요청별 난수 생성기
+
+- 전역 random 을 쓰지 않으므로 동시에 합성해도 서로의 난수열을 건드리지 않음
+- seed 를 주지 않으면 (엔진 이름, 텍스트, 파라미터) 의 안정적인 해시로 정함
+    → 같은 요청은 어느 프로세스에서든 항상 바이트 단위로 같은 음성 (캐시 적중)
+"""
+import hashlib
+import json
+import random
+from typing import Optional
+
+
+def stable_seed(*parts) -> int:
+    """파라미터들의 sha256 에서 얻은 64bit 시드 (hash() 와 달리 프로세스마다 바뀌지 않음)"""
+    payload = json.dumps(parts, ensure_ascii=False, separators=(",", ":"), default=str)
+    return int.from_bytes(hashlib.sha256(payload.encode("utf-8")).digest()[:8], "big")
+
+
+def make_rng(seed: Optional[int], *parts) -> random.Random:
+    """seed 가 있으면 그대로, 없으면 parts 로 정한 시드의 독립 Random 인스턴스"""
+    return random.Random(stable_seed(*parts) if seed is None else seed)
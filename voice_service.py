@@ -0,0 +1,308 @@
+# voice_service.py
+"""
+Streamlit 없이 쓰는 음성 합성 HTTP 서비스 (로봇 클라이언트 / 다른 프론트엔드용)
+
+    python voice_service.py --port 8502
+    SYNTH_EXECUTOR=process SYNTH_WORKERS=8 python voice_service.py
+
+    POST /v1/synthesize   {"text": "안녕하세요", "voice_style": "너굴", "emotion": "positive",
+                           "random_factor": 0.35, "seed": 7, "format": "wav"}  → 오디오 bytes
+                          (seed 생략 시 텍스트와 파라미터로 정해져 같은 요청은 같은 음성)
+    POST /v1/encode?format=mp3   (본문: WAV bytes)                        → 다시 인코딩한 bytes
+    GET  /health
+    GET  /metrics         Prometheus 텍스트 형식 (latency_metrics)
+
+- 시작할 때 워커마다 사운드 뱅크를 한 번 올려두고 계속 재사용
+- 함께 도착한 요청은 VOICE_BATCH_WAIT_MS 동안 모아 워커에 배치로 보냄
+    (같은 요청은 한 번만 합성, 프로세스 풀이면 IPC 도 배치당 한 번)
+- voice_style 은 "일반" | "너굴" | "r2-d2" | "edie" (또는 gtts / nook / r2d2)
+- emotion 은 "neutral" | "positive" | "negative" (edie 만 사용)
+- 합성 / 인코딩 오류의 자세한 내용은 서버 로그에만 남기고 클라이언트에는 알리지 않음
+"""
+import argparse
+import io
+import json
+import math
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from pydub import AudioSegment
+
+from audio_encoder import ENCODERS, MIME_TYPES
+from get_edie import EMOTIONS
+from latency_metrics import increment, render_prometheus
+from synthesis_executor import SYNTH_EXECUTOR, SYNTH_WORKERS, create_executor
+from voice_engines import VOICE_STYLES, render_batch, warm_up
+
+VOICE_SERVICE_PORT = int(os.getenv("VOICE_SERVICE_PORT", "8502"))
+VOICE_BATCH_MAX = int(os.getenv("VOICE_BATCH_MAX", "16"))          # 배치 하나의 최대 요청 수
+VOICE_BATCH_WAIT_MS = float(os.getenv("VOICE_BATCH_WAIT_MS", "10"))  # 첫 요청 뒤 더 모으는 시간
+VOICE_MAX_CHARS = int(os.getenv("VOICE_MAX_CHARS", "2000"))
+VOICE_TIMEOUT = float(os.getenv("VOICE_TIMEOUT", "60"))            # 요청 하나의 최대 대기 (초)
+MAX_BODY_BYTES = 50 * 1024 * 1024
+
+STYLE_ALIASES = {"gtts": "일반", "nook": "너굴", "r2d2": "r2-d2"}
+
+
+class MicroBatcher:
+    """
+    ➡ 요청을 큐에 모아 배치 단위로 실행기에 제출
+       - 첫 요청이 오면 wait_ms 동안 (또는 max_batch 개까지) 더 모음
+       - 같은 요청은 배치 안에서 한 번만 실행하고 결과를 나눠 줌
+       - 배치는 워커 수에 맞게 나눠 제출 (한 워커에 몰리지 않도록)
+       - 제출은 기다리지 않으므로 워커가 일하는 동안 다음 배치를 모음
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        batch_fn: Callable[[List[tuple]], List[Tuple[bool, object]]],
+        workers: int,
+        max_batch: int = VOICE_BATCH_MAX,
+        wait_ms: float = VOICE_BATCH_WAIT_MS,
+    ):
+        self._executor = executor
+        self._batch_fn = batch_fn
+        self._workers = max(1, workers)
+        self._max_batch = max(1, max_batch)
+        self._wait = wait_ms / 1000
+        self._queue: "queue.Queue[Optional[Tuple[tuple, Future]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._collect, name="voice-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, request: tuple) -> Future:
+        future: Future = Future()
+        self._queue.put((request, future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self._wait
+            stop = False
+            while len(batch) < self._max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._dispatch(batch)
+            if stop:
+                return
+
+    def _dispatch(self, batch: List[Tuple[tuple, Future]]):
+        waiters = {}  # 요청 → 기다리는 Future 들 (중복 제거)
+        for request, future in batch:
+            waiters.setdefault(request, []).append(future)
+        unique = list(waiters)
+        increment("voice_service_batches")
+        increment("voice_service_deduplicated", len(batch) - len(unique))
+
+        per_task = math.ceil(len(unique) / self._workers)
+        for start in range(0, len(unique), per_task):
+            chunk = unique[start:start + per_task]
+            try:
+                task = self._executor.submit(self._batch_fn, chunk)
+            except Exception as e:  # 실행기가 닫힌 경우 등
+                self._fail([f for request in chunk for f in waiters[request]], e)
+                continue
+            task.add_done_callback(lambda t, chunk=chunk: self._resolve(t, chunk, waiters))
+
+    @staticmethod
+    def _resolve(task: Future, chunk: List[tuple], waiters: dict):
+        try:
+            results = task.result()
+        except Exception as e:
+            MicroBatcher._fail([f for request in chunk for f in waiters[request]], e)
+            return
+        for request, (ok, value) in zip(chunk, results):
+            for future in waiters[request]:
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(RuntimeError(value))
+
+    @staticmethod
+    def _fail(futures: List[Future], error: Exception):
+        for future in futures:
+            future.set_exception(error)
+
+
+class VoiceServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    # ---------------------------------------------------------------- helpers
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error_json(self, status: int, message: str):
+        increment(f"voice_service_http_{status}")
+        body = json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, "application/json")
+
+    def _read_body(self) -> Optional[bytes]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._send_error_json(413, f"본문이 너무 큼 (최대 {MAX_BODY_BYTES} bytes)")
+            return None
+        return self.rfile.read(length)
+
+    def log_message(self, format, *args):  # 요청마다 stderr 에 찍지 않음
+        pass
+
+    # ---------------------------------------------------------------- routes
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            self._send(200, b'{"status":"ok"}', "application/json")
+        elif path == "/metrics":
+            self._send(200, render_prometheus().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self._send_error_json(404, f"알 수 없는 경로: {path}")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        try:
+            body = self._read_body()
+            if body is None:
+                return
+            if url.path == "/v1/synthesize":
+                self._synthesize(body)
+            elif url.path == "/v1/encode":
+                self._encode(body, parse_qs(url.query).get("format", ["mp3"])[0])
+            else:
+                self._send_error_json(404, f"알 수 없는 경로: {url.path}")
+        except Exception as e:  # 처리 중 예상 못 한 오류도 연결을 끊지 않고 500 으로 응답
+            print(f"[경고] {url.path} 처리 실패 → {type(e).__name__}: {e}")
+            self._send_error_json(500, "서버 오류")
+
+    def _synthesize(self, body: bytes):
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            self._send_error_json(400, "JSON 본문이 아님")
+            return
+        if not isinstance(payload, dict):
+            self._send_error_json(400, "JSON 객체가 아님")
+            return
+        text = str(payload.get("text", "")).strip()
+        voice_style = str(payload.get("voice_style", "일반"))
+        voice_style = STYLE_ALIASES.get(voice_style, voice_style)
+        emotion = str(payload.get("emotion", "neutral"))
+        audio_format = str(payload.get("format", "wav"))
+        try:
+            random_factor = float(payload.get("random_factor", 0.35))
+            seed = None if payload.get("seed") is None else int(payload["seed"])
+        except (TypeError, ValueError):
+            self._send_error_json(400, "random_factor / seed 는 숫자여야 함")
+            return
+        if not text:
+            self._send_error_json(400, "text 가 비어 있음")
+            return
+        if len(text) > VOICE_MAX_CHARS:
+            self._send_error_json(413, f"text 가 너무 김 (최대 {VOICE_MAX_CHARS}자)")
+            return
+        if voice_style not in VOICE_STYLES:
+            self._send_error_json(400, f"알 수 없는 voice_style: {voice_style} (가능: {', '.join(VOICE_STYLES)})")
+            return
+        if emotion not in EMOTIONS:
+            self._send_error_json(400, f"알 수 없는 emotion: {emotion} (가능: {', '.join(EMOTIONS)})")
+            return
+        if audio_format not in ENCODERS:
+            self._send_error_json(400, f"지원하지 않는 format: {audio_format} (가능: {', '.join(ENCODERS)})")
+            return
+
+        increment("voice_service_requests")
+        start = time.perf_counter()
+        future = self.server.batcher.submit((text, voice_style, emotion, random_factor, audio_format, seed))
+        try:
+            data = future.result(timeout=VOICE_TIMEOUT)
+        except Exception as e:
+            print(f"[경고] 합성 실패 ({voice_style}, {len(text)}자) → {e}")
+            self._send_error_json(500, "합성 실패")
+            return
+        if not data:
+            self._send_error_json(422, "합성할 수 있는 글자가 없음")
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._send(200, data, MIME_TYPES[audio_format], {"X-Synthesis-Ms": f"{elapsed_ms:.1f}"})
+
+    def _encode(self, body: bytes, audio_format: str):
+        if audio_format not in ENCODERS:
+            self._send_error_json(400, f"지원하지 않는 format: {audio_format} (가능: {', '.join(ENCODERS)})")
+            return
+        try:
+            segment = AudioSegment.from_wav(io.BytesIO(body))
+            data = self.server.executor.submit(ENCODERS[audio_format], segment).result(timeout=VOICE_TIMEOUT)
+        except Exception as e:
+            print(f"[경고] WAV 인코딩 실패 ({audio_format}, {len(body)} bytes) → {e}")
+            self._send_error_json(400, "WAV 인코딩 실패")
+            return
+        self._send(200, data, MIME_TYPES[audio_format])
+
+
+class VoiceService(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], kind: str = SYNTH_EXECUTOR, workers: int = SYNTH_WORKERS,
+                 max_batch: int = VOICE_BATCH_MAX, wait_ms: float = VOICE_BATCH_WAIT_MS):
+        if kind == "thread":
+            warm_up()  # 스레드 풀은 뱅크를 프로세스 안에서 공유하므로 한 번만
+        self.executor = create_executor(kind, workers, initializer=warm_up if kind == "process" else None)
+        self.batcher = MicroBatcher(self.executor, render_batch, workers, max_batch, wait_ms)
+        super().__init__(address, VoiceServiceHandler)
+
+    def server_close(self):
+        super().server_close()
+        self.batcher.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="음성 합성 HTTP 서비스")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=VOICE_SERVICE_PORT)
+    parser.add_argument("--executor", choices=["thread", "process"], default=SYNTH_EXECUTOR)
+    parser.add_argument("--workers", type=int, default=SYNTH_WORKERS)
+    parser.add_argument("--batch-max", type=int, default=VOICE_BATCH_MAX)
+    parser.add_argument("--batch-wait-ms", type=float, default=VOICE_BATCH_WAIT_MS)
+    args = parser.parse_args()
+
+    server = VoiceService((args.host, args.port), args.executor, args.workers, args.batch_max, args.batch_wait_ms)
+    print(f"voice service: http://{args.host}:{args.port}  ({args.executor} x {args.workers}, "
+          f"batch ≤ {args.batch_max} / {args.batch_wait_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()